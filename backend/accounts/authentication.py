@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+
+# The User fields authentication, permissions and views read from request.user
+CACHED_USER_FIELDS = ('username', 'email', 'is_active', 'is_staff', 'is_superuser')
+
+
+def user_cache_key(user_id):
+    return 'accounts:user:v2:%s' % user_id
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that serves the user from the cache instead of
+    loading the row on every request.
+
+    Only CACHED_USER_FIELDS are cached, with the digest of the password hash
+    that revocable tokens carry; never the hash itself. The user is rebuilt
+    from them as a partial row (see `partial_user`). Entries live for
+    AUTH_USER_CACHE_TIMEOUT seconds and are dropped when the user is saved
+    or deleted (see accounts.signals).
+
+    With AUTH_USER_FROM_TOKEN_CLAIMS enabled the user is built from the
+    token's claims without touching the cache or database at all;
+    deactivation and changes to staff status then only take effect when the
+    access token expires.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if settings.AUTH_USER_FROM_TOKEN_CLAIMS and 'username' in validated_token:
+            return self.user_from_claims(user_id, validated_token)
+
+        key = user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is None:
+            # The parent does the lookup plus the is_active/revocation checks.
+            user = super().get_user(validated_token)
+            cached = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+            cached['password_digest'] = get_md5_hash_password(user.password)
+            cache.set(key, cached, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not cached['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != cached['password_digest']:
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return self.partial_user(user_id, **{field: cached[field] for field in CACHED_USER_FIELDS})
+
+    @classmethod
+    def user_from_claims(cls, user_id, validated_token):
+        """
+        A partial User carrying the id, username, email and staff flags from
+        the token. Tokens issued without the flags authenticate as non-staff.
+        """
+        return cls.partial_user(
+            user_id,
+            username=validated_token['username'],
+            email=validated_token.get('email', ''),
+            is_active=True,
+            is_staff=validated_token.get('is_staff', False),
+            is_superuser=validated_token.get('is_superuser', False),
+        )
+
+    @staticmethod
+    def partial_user(user_id, **fields):
+        """
+        A User with only `fields` set, marked `partial`.
+
+        It is good for ownership filters, foreign keys and permission checks,
+        but it is not a full row: views that read or save other fields must
+        reload it.
+        """
+        user = User(**{api_settings.USER_ID_FIELD: user_id}, **fields)
+        user._state.adding = False
+        user._state.db = DEFAULT_DB_ALIAS
+        user.partial = True
+        return user
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:43
+
+import accounts.models
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_lookup_columns(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    last_pk = 0
+    while True:
+        upper = users.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[BACKFILL_BATCH_SIZE - 1:BACKFILL_BATCH_SIZE].first()
+        batch = users.filter(pk__gt=last_pk)
+        if upper is not None:
+            batch = batch.filter(pk__lte=upper)
+        batch.update(email_lower=Lower('email'), username_lower=Lower('username'))
+        if upper is None:
+            break
+        last_pk = upper
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', accounts.models.UserManager()),
+            ],
+        ),
+        # Add the columns unindexed, backfill in primary-key ranges, then
+        # build the indexes once over the filled columns.
+        migrations.AddField(
+            model_name='user',
+            name='email_lower',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_lower',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_lookup_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='email_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='username_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_login_lookup_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='available_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='sold_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
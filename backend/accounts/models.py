@@ -1,6 +1,26 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
 
+
+class UserManager(DjangoUserManager):
+    def get_by_login(self, login):
+        """
+        Case-insensitive lookup by email or username through the indexed,
+        lower-cased copies of both columns. An email match wins if the login
+        happens to be one user's email and another user's username.
+        """
+        login = login.lower()
+        matches = list(
+            self.filter(models.Q(email_lower=login) | models.Q(username_lower=login))[:2]
+        )
+        for user in matches:
+            if user.email_lower == login:
+                return user
+        if matches:
+            return matches[0]
+        raise self.model.DoesNotExist('No user matches the given login.')
+
+
 class User(AbstractUser):
     """
     Custom User model where email is the primary identifier for authentication.
@@ -24,9 +44,20 @@ class User(AbstractUser):
     phone = models.CharField(max_length=20, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     
+    # Lower-cased copies of email and username, kept in sync by save(), so
+    # case-insensitive login can use a plain index instead of UPPER()/LIKE.
+    email_lower = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    username_lower = models.CharField(max_length=150, db_index=True, editable=False, default='')
+
+    # Seller counters, maintained with F() updates by products.counters
+    available_products_count = models.IntegerField(default=0, editable=False)
+    sold_products_count = models.IntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserManager()
+
     # Set the email field as the unique identifier for logging in.
     USERNAME_FIELD = 'email'
     # 'username' is still required when creating a user, e.g., via createsuperuser command.
@@ -34,3 +65,24 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        self.email_lower = (self.email or '').lower()
+        self.username_lower = (self.username or '').lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # Never write back counters read earlier (possibly from the auth
+            # cache); they only move through F() updates.
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('available_products_count', 'sold_products_count')
+            ]
+            kwargs['update_fields'] = update_fields
+        elif update_fields is not None:
+            update_fields = set(update_fields)
+            if 'email' in update_fields:
+                update_fields.add('email_lower')
+            if 'username' in update_fields:
+                update_fields.add('username_lower')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from rest_framework.validators import UniqueValidator
-from django.db.models import Q
+
+from ecofinds.metrics import TimedSerializerMixin
 from .models import User
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -66,7 +67,7 @@ class UserLoginSerializer(serializers.Serializer):
         if login and password:
             # Allow case-insensitive login for both email and username
             try:
-                user_obj = User.objects.get(Q(email__iexact=login) | Q(username__iexact=login))
+                user_obj = User.objects.get_by_login(login)
                 # check_password handles the hashing and comparison
                 if user_obj.check_password(password):
                     user = user_obj
@@ -90,14 +91,15 @@ class UserLoginSerializer(serializers.Serializer):
         attrs['user'] = user
         return attrs
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the User model, used for displaying and updating profile data.
     """
     class Meta:
         model = User
         # Include the new 'phone' and 'address' fields.
-        fields = ('id', 'email', 'username', 'first_name', 'last_name', 'phone', 'address')
+        fields = ('id', 'email', 'username', 'first_name', 'last_name', 'phone', 'address',
+                  'available_products_count', 'sold_products_count')
         # Make email and username read-only on profile updates to prevent changes.
-        read_only_fields = ('id', 'email', 'username')
+        read_only_fields = ('id', 'email', 'username', 'available_products_count', 'sold_products_count')
 
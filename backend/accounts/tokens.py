@@ -0,0 +1,19 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries `username`, `email` and the staff flags,
+    so access tokens minted from it can authenticate, and pass permission
+    checks, without loading the user
+    (see CachedJWTAuthentication.user_from_claims).
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['email'] = user.email
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
@@ -2,9 +2,9 @@ from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer
+from .tokens import UserRefreshToken
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -18,7 +18,7 @@ def register(request):
     # If validation fails, it will populate serializer.errors with clear messages.
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -39,7 +39,7 @@ def login(request):
     serializer = UserLoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -58,4 +58,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         # This method ensures that the user can only view and edit their own profile.
-        return self.request.user
+        user = self.request.user
+        if getattr(user, 'partial', False):
+            # Built from the auth cache or JWT claims; load the full row before reading or saving it.
+            user = User.objects.get(pk=user.pk)
+        return user
@@ -0,0 +1,56 @@
+"""
+Latency of search box suggestions.
+
+Builds the autocomplete index from the database, then times
+`PrefixIndex.suggest()` for every 1- to 6-character prefix of a sample of
+product titles and prints microseconds per lookup by prefix length.
+
+    python manage.py seed_data
+    python -m benchmarks.autocomplete --sample 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks.common import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sample', type=int, default=200, help='Titles whose prefixes are looked up')
+    parser.add_argument('--limit', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from products.autocomplete import PrefixIndex, TITLE, normalize
+
+    started = time.perf_counter()
+    index = PrefixIndex.build()
+    built = time.perf_counter() - started
+    titles = [index.texts[sid] for sid, kind in enumerate(index.kinds) if kind == TITLE]
+    if not titles:
+        sys.exit('No products found; run `python manage.py seed_data` first.')
+    titles = random.Random(0).sample(titles, min(len(titles), args.sample))
+
+    report = {'suggestions': len(index.texts), 'entries': len(index.entries[0]), 'build_seconds': round(built, 2)}
+    for length in range(1, 7):
+        prefixes = [normalize(title)[:length] for title in titles]
+        for prefix in prefixes:
+            index.suggest(prefix, args.limit)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for prefix in prefixes:
+                index.suggest(prefix, args.limit)
+            timings.append((time.perf_counter() - started) / len(prefixes))
+        report['prefix_%d_us' % length] = round(min(timings) * 1e6, 1)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Concurrent checkout benchmark.
+
+Creates a pool of "hot" products and many buyers whose carts each hold a
+random overlapping subset of them, then fires every buyer's checkout at
+once. Reports latency percentiles, throughput, the 201/409 split and
+verifies that no product sold more units than it listed.
+
+    python -m benchmarks.checkout --buyers 200 --products 50 --stock 5 --cart-size 3 --workers 32
+"""
+
+import argparse
+import json
+import random
+import uuid
+from collections import Counter
+
+from benchmarks.common import api_client, run_concurrently, setup_django, summarize, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--buyers', type=int, default=100)
+    parser.add_argument('--products', type=int, default=20, help='Size of the contended product pool')
+    parser.add_argument('--stock', type=int, default=1, help='Units listed per product')
+    parser.add_argument('--cart-size', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db.models import Sum
+    from cart.models import CartItem, OrderItem
+    from products.models import Category, Product
+
+    User = get_user_model()
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+
+    seller = User.objects.create_user(email=f'bench-seller-{run_id}@example.com', username=f'bench-seller-{run_id}', password=None)
+    category = Category.objects.create(name=f'bench-{run_id}')
+    Product.objects.bulk_create([
+        Product(title=f'Hot item {i}', description='benchmark', price=10 + i,
+                quantity=args.stock, category=category, seller=seller)
+        for i in range(args.products)
+    ])
+    User.objects.bulk_create([
+        User(
+            email=f'bench-buyer-{run_id}-{i}@example.com', email_lower=f'bench-buyer-{run_id}-{i}@example.com',
+            username=f'bench-buyer-{run_id}-{i}', username_lower=f'bench-buyer-{run_id}-{i}',
+        )
+        for i in range(args.buyers)
+    ])
+    # MySQL's bulk_create does not return primary keys, so read the rows back.
+    products = list(Product.objects.filter(category=category).order_by('id'))
+    buyers = list(User.objects.filter(username__startswith=f'bench-buyer-{run_id}-').order_by('id'))
+    CartItem.objects.bulk_create([
+        CartItem(user=buyer, product=product)
+        for buyer in buyers
+        for product in rng.sample(products, min(args.cart_size, len(products)))
+    ])
+
+    def checkout(buyer):
+        client = api_client(buyer)
+        response, elapsed = timed(client.post, '/api/cart/checkout/', HTTP_IDEMPOTENCY_KEY=uuid.uuid4().hex)
+        return response.status_code, elapsed
+
+    try:
+        results, elapsed = run_concurrently(checkout, buyers, args.workers)
+        oversold = (
+            OrderItem.objects.filter(product__in=products)
+            .values('product').annotate(sold=Sum('quantity')).filter(sold__gt=args.stock).count()
+        )
+        report = summarize([latency for _, latency in results], elapsed)
+        report['statuses'] = dict(Counter(code for code, _ in results))
+        report['oversold_products'] = oversold
+        print(json.dumps(report, indent=2))
+    finally:
+        User.objects.filter(pk__in=[seller.pk] + [buyer.pk for buyer in buyers]).delete()
+        category.delete()
+
+
+if __name__ == '__main__':
+    main()
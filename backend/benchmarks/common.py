@@ -0,0 +1,80 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run them from the backend directory against a real MySQL database, e.g.
+`python -m benchmarks.checkout`. SQLite serializes writers, so contention
+numbers measured on it are meaningless.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecofinds.settings')
+    import django
+    django.setup()
+
+
+def api_client(user=None):
+    """An in-process DRF client whose host passes ALLOWED_HOSTS."""
+    from rest_framework.test import APIClient
+
+    client = APIClient(SERVER_NAME='localhost')
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Latency percentiles in milliseconds plus throughput, for a list of seconds."""
+    return {
+        'requests': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def run_concurrently(task, jobs, workers):
+    """
+    Call `task(job)` for every job on `workers` threads.
+
+    Returns `(results, elapsed_seconds)`. Each worker thread closes its own
+    database connection when the pool shuts down.
+    """
+    from django.db import connection
+
+    def wrapped(job):
+        try:
+            return task(job)
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(wrapped, jobs))
+    return results, time.perf_counter() - start
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
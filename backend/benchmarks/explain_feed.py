@@ -0,0 +1,90 @@
+"""
+Check that filtered, sorted feed pages are served from the feed indexes.
+
+Runs the product list view's filter and pagination pipeline for a set of
+common query strings, captures the page query (first page and the one
+after it) and prints its EXPLAIN plan. Exits with status 1 if a plan does
+not mention the index expected for that combination.
+
+    python -m benchmarks.explain_feed
+
+Run it against MySQL with realistic data (see `manage.py seed_data`).
+SQLite renders `is_available=True` as a bare column rather than
+`is_available = 1`, so it cannot sort through these indexes and its plans
+are not representative.
+"""
+
+import argparse
+import sys
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from benchmarks.common import setup_django
+
+# (query string, index expected to drive the page query)
+CASES = (
+    ({}, 'product_feed_created_idx'),
+    ({'year_min': 2010, 'weight_max': 5}, 'product_feed_created_idx'),
+    ({'category': '{category}'}, 'product_feed_category_idx'),
+    ({'category': '{category}', 'price_min': 10, 'price_max': 200}, 'product_feed_category_idx'),
+    ({'ordering': 'price', 'price_min': 10, 'price_max': 200}, 'product_feed_price_idx'),
+    ({'ordering': '-price'}, 'product_feed_price_idx'),
+)
+
+
+def page_query(view_class, params):
+    """SQL of the page query for `params`, and the cursor of the next page."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get('/api/products/?' + urlencode(params), SERVER_NAME='localhost'))
+    view = view_class(request=request, args=(), kwargs={}, format_kwarg=None)
+    queryset = view.filter_queryset(view.get_queryset())
+    with CaptureQueriesContext(connection) as captured:
+        view.paginator.paginate_queryset(queryset, request, view=view)
+    sql = [query['sql'] for query in captured.captured_queries if 'products_product' in query['sql']][0]
+    return sql, view.paginator.get_next_link()
+
+
+def explain(sql):
+    from django.db import connection
+
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return '\n'.join(' | '.join(str(value) for value in row) for row in cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--category', type=int, help='Category id for the category cases (default: the largest)')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import Count
+    from products.models import Category
+    from products.views import ProductListView
+
+    category = args.category or (
+        Category.objects.annotate(size=Count('products')).order_by('-size').values_list('pk', flat=True).first()
+    )
+    failures = 0
+    for template, index in CASES:
+        params = {key: str(value).format(category=category) for key, value in template.items()}
+        sql, next_link = page_query(ProductListView, params)
+        pages = [('first page', sql)]
+        if next_link:
+            next_params = dict(params, cursor=parse_qs(urlparse(next_link).query)['cursor'][0])
+            pages.append(('next page', page_query(ProductListView, next_params)[0]))
+        for label, page_sql in pages:
+            plan = explain(page_sql)
+            ok = index in plan
+            failures += not ok
+            print('%s %s (%s), expected %s\n%s\n' % ('OK  ' if ok else 'FAIL', urlencode(params) or '<default>', label, index, plan))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Login throughput benchmark.
+
+Seeds up to `--users` accounts (reused across runs), then reports p50/p95/p99
+separately for the user lookup (User.objects.get_by_login), the password
+hash check, and the full POST /api/auth/login/ round trip.
+
+    python -m benchmarks.login --users 1000000 --samples 2000 --workers 8
+"""
+
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import api_client, run_concurrently, setup_django, summarize, timed
+
+PREFIX = 'bench-login-'
+PASSWORD = 'bench-password-1'
+
+
+def seed_users(User, total, chunk_size):
+    from django.contrib.auth.hashers import make_password
+
+    existing = User.objects.filter(username_lower__startswith=PREFIX).count()
+    if existing >= total:
+        return existing
+    # Hashing is the expensive part of creating users; every seeded account
+    # shares one hash so seeding a million rows takes minutes, not hours.
+    password = make_password(PASSWORD)
+    for start in range(existing, total, chunk_size):
+        users = []
+        for i in range(start, min(start + chunk_size, total)):
+            username = f'{PREFIX}{i}'
+            email = f'{username}@example.com'
+            users.append(User(
+                username=username, username_lower=username,
+                email=email, email_lower=email, password=password,
+            ))
+        User.objects.bulk_create(users, batch_size=chunk_size)
+        print(f'seeded {start + len(users)}/{total} users', flush=True)
+    return total
+
+
+def sample_logins(rng, total, samples):
+    """A mix of email, username and mixed-case logins, plus some misses."""
+    logins = []
+    for _ in range(samples):
+        i = rng.randrange(total)
+        kind = rng.random()
+        if kind < 0.45:
+            logins.append(f'{PREFIX}{i}@example.com')
+        elif kind < 0.9:
+            logins.append(f'{PREFIX}{i}')
+        elif kind < 0.95:
+            logins.append(f'{PREFIX}{i}@Example.COM'.upper())
+        else:
+            logins.append(f'{PREFIX}missing-{i}')
+    return logins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cleanup', action='store_true', help='Delete the seeded users afterwards')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    rng = random.Random(args.seed)
+    total = seed_users(User, args.users, args.chunk_size)
+    logins = sample_logins(rng, args.users, args.samples)
+
+    lookup_latencies = []
+    found = []
+    start = time.perf_counter()
+    for login in logins:
+        started = time.perf_counter()
+        try:
+            found.append(User.objects.get_by_login(login))
+        except User.DoesNotExist:
+            pass
+        lookup_latencies.append(time.perf_counter() - started)
+    lookup = summarize(lookup_latencies, time.perf_counter() - start)
+
+    hash_latencies = []
+    start = time.perf_counter()
+    for user in found[:100]:
+        _, elapsed = timed(user.check_password, PASSWORD)
+        hash_latencies.append(elapsed)
+    password_hash = summarize(hash_latencies, time.perf_counter() - start)
+
+    def login(identifier):
+        response, elapsed = timed(api_client().post, '/api/auth/login/', {'login': identifier, 'password': PASSWORD})
+        return response.status_code, elapsed
+
+    results, elapsed = run_concurrently(login, logins[:min(len(logins), 500)], args.workers)
+    endpoint = summarize([latency for _, latency in results], elapsed)
+
+    print(json.dumps({
+        'users': total,
+        'lookup': lookup,
+        'password_hash': password_hash,
+        'login_endpoint': endpoint,
+    }, indent=2))
+
+    if args.cleanup:
+        User.objects.filter(username_lower__startswith=PREFIX).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Endpoint benchmark runner.
+
+Fires `--requests` requests per scenario at `--workers` concurrency against
+data created by `manage.py seed_data`, and prints (or writes with
+`--output`) a JSON report with p50/p95/p99 latency, throughput, status
+codes and SQL queries per request, the latter read from the Server-Timing
+header set by ecofinds.metrics.
+
+    python manage.py seed_data --users 100000 --products 1000000 --orders 200000
+    python -m benchmarks.run --requests 2000 --workers 16 --output current.json
+    python -m benchmarks.run --baseline baseline.json --max-regression 10
+
+With `--baseline` every scenario is compared against a stored report; the
+run exits with status 1 if a latency percentile or the throughput got worse
+by more than `--max-regression` percent or queries per request went up.
+The request mix depends only on `--seed`, but checkout consumes stock, so
+reseed before runs that are meant to be compared.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+
+from benchmarks.common import api_client, run_concurrently, setup_django, summarize, timed
+
+SCENARIOS = ('feed', 'search', 'detail', 'cart', 'login', 'checkout')
+SEARCH_TERMS = ('laptop', 'vintage sofa', 'nike', 'lego set', 'camera', 'oak table', 'bike', 'novel', 'jacket', 'lamp')
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# Lower is better for these; higher is better for throughput.
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def build_jobs(scenario, rng, count, context):
+    """`count` (method, path, data, user) requests for one scenario."""
+    users, products, categories = context['users'], context['products'], context['categories']
+    jobs = []
+    for _ in range(count):
+        if scenario == 'feed':
+            params = {'page_size': rng.choice((20, 50))}
+            if rng.random() < 0.5:
+                params['category'] = rng.choice(categories)
+            if rng.random() < 0.3:
+                params['ordering'] = rng.choice(('price', '-price'))
+            jobs.append(('get', '/api/products/', params, None))
+        elif scenario == 'search':
+            jobs.append(('get', '/api/products/', {'search': rng.choice(SEARCH_TERMS)}, None))
+        elif scenario == 'detail':
+            jobs.append(('get', '/api/products/%d/' % rng.choice(products), None, None))
+        elif scenario == 'cart':
+            jobs.append(('get', '/api/cart/', None, rng.choice(users)))
+        elif scenario == 'login':
+            user = rng.choice(users)
+            login = user.email if rng.random() < 0.5 else user.username
+            jobs.append(('post', '/api/auth/login/', {'login': login, 'password': context['password']}, None))
+        elif scenario == 'checkout':
+            jobs.append(('checkout', rng.choice(products), None, rng.choice(users)))
+    return jobs
+
+
+def run_scenario(scenario, jobs, workers, tokens):
+    def request(job):
+        method, path, data, user = job
+        client = api_client()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION='Bearer %s' % tokens[user.pk])
+        if method == 'checkout':
+            # Only the checkout itself is timed, not filling the cart.
+            client.post('/api/cart/add/', {'product': path, 'quantity': 1}, format='json')
+            response, elapsed = timed(client.post, '/api/cart/checkout/', HTTP_IDEMPOTENCY_KEY=uuid.uuid4().hex)
+        elif method == 'post':
+            response, elapsed = timed(client.post, path, data, format='json')
+        else:
+            response, elapsed = timed(client.get, path, data)
+        match = QUERIES_RE.search(response.get('Server-Timing', ''))
+        return response.status_code, elapsed, int(match.group(1)) if match else None
+
+    results, elapsed = run_concurrently(request, jobs, workers)
+    report = summarize([latency for _, latency, _ in results], elapsed)
+    queries = [count for _, _, count in results if count is not None]
+    report['queries_per_request'] = round(sum(queries) / len(queries), 2) if queries else None
+    report['statuses'] = {str(code): count for code, count in sorted(Counter(code for code, _, _ in results).items())}
+    return report
+
+
+def compare(current, baseline, max_regression):
+    """Per-metric changes against the baseline, plus the list of regressions."""
+    comparison, regressions = {}, []
+    for scenario, report in current.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        changes = {}
+        for metric in LATENCY_METRICS + ('throughput_rps', 'queries_per_request'):
+            before, after = base.get(metric), report.get(metric)
+            if before is None or after is None:
+                continue
+            change = round((after - before) / before * 100, 1) if before else None
+            changes[metric] = {'baseline': before, 'current': after, 'change_pct': change}
+            if metric == 'queries_per_request':
+                worse = after > before
+            elif change is None:
+                worse = False
+            elif metric == 'throughput_rps':
+                worse = change < -max_regression
+            else:
+                worse = change > max_regression
+            if worse:
+                regressions.append('%s.%s' % (scenario, metric))
+        comparison[scenario] = changes
+    return comparison, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset of: %s' % ', '.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prefix', default='seed', help='Prefix given to seed_data')
+    parser.add_argument('--sample-users', type=int, default=1000)
+    parser.add_argument('--sample-products', type=int, default=10000)
+    parser.add_argument('--output', help='Write the JSON report here as well as to stdout')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='Allowed slowdown in percent')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error('unknown scenarios: %s' % ', '.join(sorted(unknown)))
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from accounts.tokens import UserRefreshToken
+    from products.models import Category, Product
+    from products.seeding import SEED_PASSWORD
+
+    User = get_user_model()
+    users = list(
+        User.objects.filter(username_lower__startswith='%s-user-' % args.prefix).order_by('pk')[:args.sample_users]
+    )
+    products = list(
+        Product.objects.filter(is_available=True).order_by('pk').values_list('pk', flat=True)[:args.sample_products]
+    )
+    if not users or not products:
+        sys.exit('No seeded data found; run `python manage.py seed_data --prefix %s` first.' % args.prefix)
+    context = {
+        'users': users,
+        'products': products,
+        'categories': list(Category.objects.order_by('pk').values_list('pk', flat=True)),
+        'password': SEED_PASSWORD,
+    }
+    tokens = {user.pk: str(UserRefreshToken.for_user(user).access_token) for user in users}
+
+    rng = random.Random(args.seed)
+    results = {}
+    for scenario in scenarios:
+        jobs = build_jobs(scenario, rng, args.warmup + args.requests, context)
+        if args.warmup:
+            run_scenario(scenario, jobs[:args.warmup], args.workers, tokens)
+        results[scenario] = run_scenario(scenario, jobs[args.warmup:], args.workers, tokens)
+        print('%s: %s' % (scenario, json.dumps(results[scenario])), file=sys.stderr, flush=True)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'database': connection.vendor,
+            'requests': args.requests,
+            'workers': args.workers,
+            'seed': args.seed,
+        },
+        'scenarios': results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['comparison'], regressions = compare(results, baseline.get('scenarios', {}), args.max_regression)
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-row cost of rendering feed and cart pages.
+
+Renders the same pages of seeded products (and a seeded user's cart) with
+the DRF serializers and stdlib-json JSONRenderer that served them before,
+and with the `.values()` row serializers and FastJSONRenderer that serve
+them now, and prints microseconds per row for the query, serialization and
+rendering stages of each. Exits with status 1 if the two paths produce
+different bytes.
+
+    python manage.py seed_data
+    python -m benchmarks.serialization --page-size 100 --repeat 50
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.common import setup_django
+
+
+def measure(repeat, rows, query, serialize, render):
+    """Best-of-`repeat` microseconds per row for each stage, and the rendered bytes."""
+    best = {'query': float('inf'), 'serialize': float('inf'), 'render': float('inf')}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page = query()
+        fetched = time.perf_counter()
+        data = serialize(page)
+        serialized = time.perf_counter()
+        content = render(data)
+        rendered = time.perf_counter()
+        for stage, seconds in (('query', fetched - started), ('serialize', serialized - fetched), ('render', rendered - serialized)):
+            best[stage] = min(best[stage], seconds)
+    per_row = {stage: round(seconds / rows * 1e6, 2) for stage, seconds in best.items()}
+    per_row['total'] = round(sum(per_row.values()), 2)
+    return per_row, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--prefix', default='seed', help='Prefix given to seed_data')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from cart.models import CartItem
+    from cart.serializers import CartItemSerializer
+    from ecofinds.renderers import FastJSONRenderer
+    from products.models import Product, ProductListing, primary_image_prefetch
+    from products.rows import CartItemRows, ProductListingRows, ProductListRows
+    from products.serializers import ProductListSerializer
+
+    request = Request(APIRequestFactory().get('/api/products/', SERVER_NAME='localhost'))
+    context = {'request': request}
+    size = args.page_size
+
+    products = Product.objects.filter(is_available=True).order_by('-created_at', '-id')
+    buyer = (
+        get_user_model().objects.filter(username_lower__startswith='%s-user-' % args.prefix)
+        .annotate(items=Count('cart_items')).order_by('-items').first()
+    )
+    carts = CartItem.objects.filter(user=buyer).order_by('-added_at', '-id')
+    if not products.exists() or buyer is None or not carts.exists():
+        sys.exit('No seeded data found; run `python manage.py seed_data --prefix %s` first.' % args.prefix)
+
+    cases = {
+        'feed': (
+            products[:size].count(),
+            lambda: list(products.for_listing()[:size]),
+            lambda page: ProductListSerializer(page, many=True, context=context).data,
+            lambda: list(ProductListRows.rows(products)[:size]),
+            lambda page: ProductListRows(page, many=True, context=context).data,
+        ),
+        'cart': (
+            carts.count(),
+            lambda: list(
+                carts.select_related('product__seller', 'product__category')
+                     .prefetch_related(primary_image_prefetch('product__images'))
+            ),
+            lambda page: CartItemSerializer(page, many=True, context=context).data,
+            lambda: list(CartItemRows.rows(carts)),
+            lambda page: CartItemRows(page, many=True, context=context).data,
+        ),
+    }
+    listings = ProductListing.objects.filter(is_available=True).order_by('-created_at', '-id')
+    if listings.exists():
+        cases['feed_listings'] = cases['feed'][:3] + (
+            lambda: list(ProductListingRows.rows(listings)[:size]),
+            lambda page: ProductListingRows(page, many=True, context=context).data,
+        )
+
+    old_renderer, new_renderer = JSONRenderer(), FastJSONRenderer()
+    report, mismatches = {}, []
+    for name, (rows, old_query, old_serialize, new_query, new_serialize) in cases.items():
+        before, old_content = measure(args.repeat, rows, old_query, old_serialize, old_renderer.render)
+        after, new_content = measure(args.repeat, rows, new_query, new_serialize, new_renderer.render)
+        report[name] = {'rows': rows, 'serializer_us_per_row': before, 'rows_us_per_row': after}
+        if old_content != new_content:
+            mismatches.append(name)
+    report['mismatches'] = mismatches
+
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
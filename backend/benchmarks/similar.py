@@ -0,0 +1,97 @@
+"""
+Latency of similar-product lookups.
+
+Times `SimilarIndex.similar()` for single products and batches, against
+the current build (`python manage.py rebuild_similar_index`) or, with
+`--synthetic N`, an in-memory index of N random products spread over
+`--categories` categories, and prints milliseconds per call and the recall
+of the partitioned lookup against a scan of whole categories.
+
+    python -m benchmarks.similar --synthetic 1000000 --categories 20
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import setup_django
+
+
+def synthetic_index(count, categories, dimensions):
+    import numpy as np
+    from django.conf import settings
+    from products.similar import SimilarIndex, _normalize, _partition
+
+    rng = np.random.default_rng(0)
+    # Clustered around one random topic per 1000 products, like real listings
+    topics = rng.normal(size=(max(1, count // 1000), dimensions)).astype(np.float32)
+    vectors = topics[rng.integers(0, len(topics), count)]
+    vectors += rng.normal(scale=0.5, size=vectors.shape).astype(np.float32)
+    vectors = _normalize(vectors)
+    categories = np.sort(rng.integers(1, categories + 1, count)).astype(np.int64)
+    order, partitions, centroids = _partition(vectors, categories, settings.SIMILAR_PRODUCTS_PARTITION_SIZE)
+    return SimilarIndex(
+        vectors[order], np.arange(1, count + 1, dtype=np.int64), categories,
+        rng.normal(4, 1, count).astype(np.float32), np.ones(dimensions, dtype=np.float32),
+        partitions, centroids, datetime.now(timezone.utc),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, default=0, help='Index N random products instead of the current build')
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=12)
+    parser.add_argument('--batch', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test import override_settings
+    from products.similar import SimilarIndex, current_build
+
+    if args.synthetic:
+        index = synthetic_index(args.synthetic, args.categories, settings.SIMILAR_PRODUCTS_DIMENSIONS)
+        # No database behind a synthetic index: nothing to refresh.
+        index.refresh = lambda product_ids=None: None
+    else:
+        path = current_build()
+        if path is None:
+            sys.exit('No similar products index; run `python manage.py rebuild_similar_index` first.')
+        index = SimilarIndex.load(path)
+    ids = [int(pk) for pk in random.Random(0).sample(list(index.ids), min(len(index.ids), args.repeat * args.batch))]
+
+    def per_call(batch):
+        timings = []
+        for start in range(0, args.repeat * batch, batch):
+            chunk = ids[start % len(ids):][:batch]
+            started = time.perf_counter()
+            index.similar(chunk, args.limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {'p50_ms': round(timings[len(timings) // 2], 3), 'p95_ms': round(timings[int(len(timings) * 0.95)], 3)}
+
+    def recall():
+        sample = ids[:args.repeat]
+        found = index.similar(sample, args.limit)
+        with override_settings(SIMILAR_PRODUCTS_PROBES=sys.maxsize):
+            exact = index.similar(sample, args.limit)
+        hits = sum(len({pk for pk, _ in found[i]} & {pk for pk, _ in exact[i]}) for i in sample)
+        return round(hits / max(1, sum(len(exact[i]) for i in sample)), 3)
+
+    index.similar(ids[:1], args.limit)  # page the vectors in
+    print(json.dumps({
+        'products': len(index.ids),
+        'partitions': len(index.partitions),
+        'single': per_call(1),
+        'batch_%d' % args.batch: per_call(args.batch),
+        'recall': recall(),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
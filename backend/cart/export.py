@@ -0,0 +1,65 @@
+from django_filters import rest_framework as filters
+
+from products.export import Exporter
+from .models import Order, OrderItem
+
+
+class OrderExportFilter(filters.FilterSet):
+    # Orders containing at least one item sold by this seller
+    seller = filters.NumberFilter(method='filter_seller')
+    created_after = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Order
+        fields = ['seller', 'user', 'status', 'created_after', 'created_before']
+
+    def filter_seller(self, queryset, name, value):
+        return queryset.filter(
+            id__in=OrderItem.objects.filter(seller_id=value).values('order_id')
+        )
+
+
+class OrderExporter(Exporter):
+    name = 'orders'
+    model = Order
+    columns = (
+        ('id', 'id'),
+        ('user_id', 'user_id'),
+        ('user_email', 'user__email'),
+        ('total_amount', 'total_amount'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+    filterset_class = OrderExportFilter
+
+
+class OrderItemExportFilter(filters.FilterSet):
+    seller = filters.NumberFilter(field_name='seller')
+    status = filters.ChoiceFilter(field_name='order__status', choices=Order.STATUS_CHOICES)
+    created_after = filters.IsoDateTimeFilter(field_name='order__created_at', lookup_expr='gte')
+    created_before = filters.IsoDateTimeFilter(field_name='order__created_at', lookup_expr='lt')
+
+    class Meta:
+        model = OrderItem
+        fields = ['seller', 'status', 'order', 'product', 'created_after', 'created_before']
+
+
+class OrderItemExporter(Exporter):
+    name = 'order-items'
+    model = OrderItem
+    columns = (
+        ('id', 'id'),
+        ('order_id', 'order_id'),
+        ('user_id', 'order__user_id'),
+        ('product_id', 'product_id'),
+        ('product_title', 'product_title'),
+        ('product_category', 'product_category'),
+        ('seller_id', 'seller_id'),
+        ('quantity', 'quantity'),
+        ('price', 'price'),
+        ('status', 'order__status'),
+        ('created_at', 'order__created_at'),
+    )
+    filterset_class = OrderItemExportFilter
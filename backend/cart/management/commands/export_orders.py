@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from products.export import FORMATS
+from cart.export import OrderExporter, OrderItemExporter
+
+
+class Command(BaseCommand):
+    help = 'Stream orders (or, with --items, order lines) as CSV or JSONL to a file or stdout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', action='store_true', help='Export order lines instead of orders')
+        parser.add_argument('--output-format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write; defaults to stdout')
+        parser.add_argument('--seller', type=int, help='Seller user id')
+        parser.add_argument('--status', help='Order status')
+        parser.add_argument('--created-after', help='ISO date or datetime (inclusive)')
+        parser.add_argument('--created-before', help='ISO date or datetime (exclusive)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        params = {
+            'seller': options['seller'],
+            'status': options['status'],
+            'created_after': options['created_after'],
+            'created_before': options['created_before'],
+        }
+        params = {key: value for key, value in params.items() if value is not None}
+        exporter = OrderItemExporter() if options['items'] else OrderExporter()
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            exporter.write(output, params, options['output_format'], options['chunk_size'])
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_snapshots(apps, schema_editor):
+    OrderItem = apps.get_model('cart', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    alias = schema_editor.connection.alias
+    items = OrderItem.objects.using(alias)
+    product = Product.objects.using(alias).filter(pk=OuterRef('product_id'))
+    primary_image = (
+        ProductImage.objects.using(alias)
+                            .filter(product_id=OuterRef('product_id'), is_primary=True, image__isnull=False)
+                            .exclude(image='')
+    )
+    last_pk = 0
+    while True:
+        upper = items.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[BACKFILL_BATCH_SIZE - 1:BACKFILL_BATCH_SIZE].first()
+        batch = items.filter(pk__gt=last_pk)
+        if upper is not None:
+            batch = batch.filter(pk__lte=upper)
+        # The snapshot columns are NOT NULL; a missing value is stored as ''.
+        batch.update(
+            product_title=Coalesce(Subquery(product.values('title')[:1]), Value('')),
+            product_category=Coalesce(Subquery(product.values('category__name')[:1]), Value('')),
+            product_image=Coalesce(Subquery(primary_image.order_by('pk').values('image')[:1]), Value('')),
+        )
+        if upper is None:
+            break
+        last_pk = upper
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productimage_renditions'),
+        ('cart', '0004_cartitem_reservations'),
+    ]
+
+    operations = [
+        # Every existing line still has its product (the FK used to cascade),
+        # so the snapshot can be copied from the live rows.
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_category',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_image',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_title',
+            field=models.CharField(default='', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='products.product'),
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
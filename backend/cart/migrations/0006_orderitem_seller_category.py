@@ -0,0 +1,46 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_owners(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    OrderItem = apps.get_model('cart', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    Category = apps.get_model('products', 'Category')
+    items = OrderItem.objects.using(alias)
+    product = Product.objects.using(alias).filter(pk=OuterRef('product_id'))
+    items.exclude(product=None).update(
+        seller_id=Subquery(product.values('seller_id')[:1]),
+        category_id=Subquery(product.values('category_id')[:1]),
+    )
+    # Lines whose listing is gone still name its category; the seller is lost.
+    items.filter(product=None).update(
+        category_id=Subquery(Category.objects.using(alias).filter(name=OuterRef('product_category')).values('pk')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_is_sold_out'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cart', '0005_orderitem_product_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='products.category'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='seller',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from products.models import Product
+from products.models import Category, Product
 
 User = get_user_model()
 
@@ -8,10 +8,17 @@ class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cart_items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Units taken out of Product.quantity for this cart until `reserved_until`
+    reserved_quantity = models.PositiveIntegerField(default=0)
+    reserved_until = models.DateTimeField(null=True, blank=True)
     added_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ['user', 'product']
+        indexes = [
+            models.Index(fields=['user', 'added_at', 'id'], name='cartitem_user_added_idx'),
+            models.Index(fields=['reserved_until'], name='cartitem_reserved_until_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.product.title}"
@@ -32,20 +39,37 @@ class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Client-supplied Idempotency-Key of the checkout request that created this order
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='order_user_idempotency_key_uniq'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # Kept for reference only; history reads the snapshot below, so the line
+    # survives the listing being edited or deleted.
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True)
     quantity = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Snapshot of the product taken at checkout
+    product_title = models.CharField(max_length=200, default='')
+    product_image = models.CharField(max_length=255, blank=True, default='')
+    product_category = models.CharField(max_length=100, blank=True, default='')
+    # Whose sale this was, for the sold counters (products.counters)
+    seller = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
 
     def __str__(self):
-        return f"{self.order} - {self.product.title}"
\ No newline at end of file
+        return f"{self.order} - {self.product_title}"
\ No newline at end of file
@@ -0,0 +1,9 @@
+from products.pagination import KeysetPagination
+
+
+class CartItemPagination(KeysetPagination):
+    ordering = ('-added_at', '-id')
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,71 @@
+"""
+Short-lived stock reservations for cart items.
+
+Adding to the cart moves units from Product.quantity onto the cart item's
+`reserved_quantity` for CART_RESERVATION_TTL. Checkout turns a held
+reservation into an order without touching the product row again, so
+buyers of a hot multi-unit listing only contend for it while reserving.
+Expired holds are handed back in batches by release_expired_reservations().
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from products.inventory import return_stock, take_stock
+from .models import CartItem
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+
+
+def reserve(user, product, quantity):
+    """Add `quantity` units of `product` to the user's cart and reserve them."""
+    with transaction.atomic():
+        if take_stock({product.id: quantity}):
+            raise OutOfStock([product.id])
+        cart_item, created = CartItem.objects.select_for_update().get_or_create(
+            user=user, product=product, defaults={'quantity': 0},
+        )
+        cart_item.quantity += quantity
+        cart_item.reserved_quantity += quantity
+        cart_item.reserved_until = timezone.now() + settings.CART_RESERVATION_TTL
+        cart_item.save()
+    return cart_item
+
+
+def release(cart_items):
+    """Return the units held by `cart_items` (which the caller has locked) to stock."""
+    quantities = Counter()
+    for item in cart_items:
+        quantities[item.product_id] += item.reserved_quantity
+    return_stock(quantities)
+
+
+def release_expired_reservations(batch_size=1000, now=None):
+    """
+    Hand expired holds back to stock, `batch_size` cart items per transaction.
+
+    Rows locked by an in-flight checkout are skipped and picked up by a
+    later sweep if they are still there. Returns the number of items released.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                CartItem.objects.select_for_update(skip_locked=True)
+                .filter(reserved_quantity__gt=0, reserved_until__lt=now)
+                .only('id', 'product_id', 'reserved_quantity')[:batch_size]
+            )
+            if not batch:
+                return released
+            CartItem.objects.filter(id__in=[item.id for item in batch]).update(
+                reserved_quantity=0, reserved_until=None,
+            )
+            release(batch)
+        released += len(batch)
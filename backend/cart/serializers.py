@@ -1,42 +1,63 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+
+from ecofinds.metrics import TimedSerializerMixin
 from .models import CartItem, Order, OrderItem
+from .reservations import OutOfStock, reserve
 from products.serializers import ProductListSerializer
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = ProductListSerializer(read_only=True)
     total_price = serializers.ReadOnlyField()
 
     class Meta:
         model = CartItem
-        fields = ['id', 'product', 'quantity', 'total_price', 'added_at']
+        fields = ['id', 'product', 'quantity', 'total_price', 'reserved_until', 'added_at']
+
+class AddToCartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    quantity = serializers.IntegerField(min_value=1, default=1)
 
-class AddToCartSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ['product', 'quantity']
 
+    def validate_product(self, product):
+        if not product.is_available:
+            raise serializers.ValidationError('This product is no longer available.')
+        return product
+
     def create(self, validated_data):
-        validated_data['user'] = self.context['request'].user
-        cart_item, created = CartItem.objects.get_or_create(
-            user=validated_data['user'],
-            product=validated_data['product'],
-            defaults={'quantity': validated_data['quantity']}
-        )
-        if not created:
-            cart_item.quantity += validated_data['quantity']
-            cart_item.save()
-        return cart_item
-
-class OrderItemSerializer(serializers.ModelSerializer):
-    product_title = serializers.CharField(source='product.title', read_only=True)
+        product = validated_data['product']
+        try:
+            return reserve(self.context['request'].user, product, validated_data['quantity'])
+        except OutOfStock:
+            raise serializers.ValidationError({'quantity': 'Not enough units in stock.'})
+
+class OrderItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    product_image = serializers.SerializerMethodField()
 
     class Meta:
         model = OrderItem
-        fields = ['id', 'product', 'product_title', 'quantity', 'price']
+        fields = ['id', 'product', 'product_title', 'product_image', 'product_category', 'quantity', 'price']
+
+    def get_product_image(self, obj):
+        if not obj.product_image:
+            return None
+        url = default_storage.url(obj.product_image)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'total_amount', 'status', 'created_at', 'updated_at', 'items']
\ No newline at end of file
+        fields = ['id', 'total_amount', 'status', 'created_at', 'updated_at', 'items']
+
+class OrderSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Order without its line items; `item_count` is annotated by the view."""
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'total_amount', 'status', 'created_at', 'updated_at', 'item_count']
\ No newline at end of file
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from products.models import Category, Product, ProductImage
+from .models import CartItem, Order, OrderItem
+
+
+class CartQueryCountTests(TestCase):
+    """
+    The cart and order history read a page in a fixed number of queries; a
+    per-row query coming back shows up as a count that grows with the rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(email='seller@example.com', username='seller', password='pw123456')
+        cls.buyer = User.objects.create_user(email='buyer@example.com', username='buyer', password='pw123456')
+        cls.category = Category.objects.create(name='Furniture')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def add_product(self, i):
+        product = Product.objects.create(
+            title='Product %d' % i, description='Description', price=10 + i, quantity=5,
+            category=self.category, seller=self.seller,
+        )
+        ProductImage.objects.create(product=product, image='products/%d.jpg' % i, is_primary=True)
+        return product
+
+    def add_cart_items(self, count):
+        start = CartItem.objects.count()
+        for i in range(start, start + count):
+            CartItem.objects.create(user=self.buyer, product=self.add_product(i), quantity=2)
+
+    def add_orders(self, count, lines=3):
+        for i in range(count):
+            order = Order.objects.create(user=self.buyer, total_amount=30)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=self.add_product(i * lines + j), quantity=1, price=10,
+                          product_title='Product', product_category='Furniture')
+                for j in range(lines)
+            ])
+
+    def test_cart(self):
+        for count in (3, 6):
+            self.add_cart_items(count)
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/cart/')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 9)
+        self.assertIsNotNone(response.data['results'][0]['product']['primary_image'])
+
+    def test_order_history(self):
+        for count in (2, 4):
+            self.add_orders(count)
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/cart/orders/')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(response.data['results'][0]['items']), 3)
+
+    def test_order_history_summary(self):
+        for count in (2, 4):
+            self.add_orders(count)
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/cart/orders/?summary=1')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['item_count'], 3)
@@ -7,4 +7,6 @@ urlpatterns = [
     path('remove/<int:item_id>/', views.remove_from_cart, name='remove-from-cart'),
     path('checkout/', views.checkout, name='checkout'),
     path('orders/', views.OrderHistoryView.as_view(), name='order-history'),
+    path('orders/export/', views.OrderExportView.as_view(), name='order-export'),
+    path('order-items/export/', views.OrderItemExportView.as_view(), name='order-item-export'),
 ]
\ No newline at end of file
@@ -1,18 +1,35 @@
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from ecofinds.db_router import ReplicaReadMixin
+from ecofinds.renderers import FastJSONRenderer
+from products.counters import CounterDeltas
+from products.inventory import return_stock, take_stock
+from products.models import Product, ProductImage
+from products.rows import CartItemRows
+from .export import OrderExporter, OrderItemExporter
 from .models import CartItem, Order, OrderItem
-from .serializers import CartItemSerializer, AddToCartSerializer, OrderSerializer
+from .pagination import CartItemPagination, OrderPagination
+from .reservations import release
+from .serializers import AddToCartSerializer, OrderSerializer, OrderSummarySerializer
 
 class CartListView(generics.ListAPIView):
-    serializer_class = CartItemSerializer
+    # Same output as CartItemSerializer, built from .values() rows
+    serializer_class = CartItemRows
     permission_classes = [IsAuthenticated]
+    pagination_class = CartItemPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
         return CartItem.objects.filter(user=self.request.user)
 
+    def paginate_queryset(self, queryset):
+        return super().paginate_queryset(CartItemRows.rows(queryset))
+
 class AddToCartView(generics.CreateAPIView):
     serializer_class = AddToCartSerializer
     permission_classes = [IsAuthenticated]
@@ -21,40 +38,168 @@ class AddToCartView(generics.CreateAPIView):
 @permission_classes([IsAuthenticated])
 def remove_from_cart(request, item_id):
     try:
-        cart_item = CartItem.objects.get(id=item_id, user=request.user)
-        cart_item.delete()
+        with transaction.atomic():
+            cart_item = CartItem.objects.select_for_update().get(id=item_id, user=request.user)
+            release([cart_item])
+            cart_item.delete()
         return Response({'message': 'Item removed from cart'}, status=status.HTTP_200_OK)
     except CartItem.DoesNotExist:
         return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
 
+class CheckoutConflict(Exception):
+    """Raised inside the checkout transaction when stock ran out meanwhile."""
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+
+
+def _order_response(request, order, status_code):
+    order = Order.objects.prefetch_related('items').get(pk=order.pk)
+    return Response(OrderSerializer(order, context={'request': request}).data, status=status_code)
+
+
+def _product_snapshots(product_ids):
+    """
+    `{product_id: OrderItem field values}` for the given products, plus
+    `{product_id: (category_id, seller_id)}`, in two queries.
+    """
+    snapshots, owners = {}, {}
+    for product_id, price, title, category, category_id, seller_id in (
+        Product.objects.filter(id__in=product_ids)
+                       .values_list('id', 'price', 'title', 'category__name', 'category_id', 'seller_id')
+    ):
+        snapshots[product_id] = {'price': price, 'product_title': title, 'product_category': category}
+        owners[product_id] = (category_id, seller_id)
+    primary_images = (
+        ProductImage.objects.filter(product_id__in=product_ids, is_primary=True)
+                            .order_by('pk')
+                            .values_list('product_id', 'image')
+    )
+    # The image the listing shows: its first primary one by pk, if that has a file
+    first = {}
+    for product_id, image in primary_images:
+        first.setdefault(product_id, image)
+    for product_id, image in first.items():
+        if image:
+            snapshots[product_id]['product_image'] = image
+    return snapshots, owners
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def checkout(request):
-    cart_items = CartItem.objects.filter(user=request.user)
-    if not cart_items.exists():
-        return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
-
-    with transaction.atomic():
-        total_amount = sum(item.total_price for item in cart_items)
-        order = Order.objects.create(user=request.user, total_amount=total_amount)
-        
-        for cart_item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
+    """
+    Turn the user's cart into an order.
+
+    The user's cart rows are locked (no other buyer contends for them).
+    Units already reserved by the cart are simply converted; any shortfall
+    is taken from stock with one conditional UPDATE, which fails instead of
+    overselling. Order lines are inserted in one bulk INSERT. An optional
+    Idempotency-Key header makes client retries return the original order
+    instead of placing a new one.
+    """
+    idempotency_key = request.headers.get('Idempotency-Key') or None
+    if idempotency_key is not None:
+        if len(idempotency_key) > 64:
+            return Response({'error': 'Idempotency-Key must be at most 64 characters'}, status=status.HTTP_400_BAD_REQUEST)
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing:
+            return _order_response(request, existing, status.HTTP_200_OK)
+
+    try:
+        with transaction.atomic():
+            cart_items = list(CartItem.objects.select_for_update().filter(user=request.user))
+            if idempotency_key is not None:
+                # A concurrent retry that held the cart lock may have just
+                # placed the order (and emptied the cart).
+                existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+                if existing:
+                    return _order_response(request, existing, status.HTTP_200_OK)
+            if not cart_items:
+                return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Reservations that were swept while the item sat in the cart
+            # (or never existed) have to be covered from stock now.
+            shortfall = take_stock({
+                item.product_id: item.quantity - item.reserved_quantity
+                for item in cart_items
+            })
+            if shortfall:
+                raise CheckoutConflict(shortfall)
+            # Held units beyond the ordered quantity go back on sale.
+            return_stock({
+                item.product_id: item.reserved_quantity - item.quantity
+                for item in cart_items
+            })
+
+            snapshots, owners = _product_snapshots([item.product_id for item in cart_items])
+            total_amount = sum(snapshots[item.product_id]['price'] * item.quantity for item in cart_items)
+            order = Order.objects.create(
+                user=request.user,
+                total_amount=total_amount,
+                idempotency_key=idempotency_key,
             )
-            cart_item.product.is_available = False
-            cart_item.product.save()
-        
-        cart_items.delete()
-        
-    return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
-
-class OrderHistoryView(generics.ListAPIView):
-    serializer_class = OrderSerializer
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product_id=item.product_id,
+                    category_id=owners[item.product_id][0],
+                    seller_id=owners[item.product_id][1],
+                    quantity=item.quantity,
+                    **snapshots[item.product_id],
+                )
+                for item in cart_items
+            ])
+            sales = CounterDeltas()
+            for item in cart_items:
+                sales.sold(*owners[item.product_id], units=item.quantity)
+            sales.apply()
+
+            CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+    except CheckoutConflict as conflict:
+        return Response(
+            {'error': 'Some items are no longer available', 'unavailable': conflict.product_ids},
+            status=status.HTTP_409_CONFLICT,
+        )
+    except IntegrityError:
+        # A concurrent retry with the same Idempotency-Key won the insert.
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if idempotency_key is None or existing is None:
+            raise
+        return _order_response(request, existing, status.HTTP_200_OK)
+
+    return _order_response(request, order, status.HTTP_201_CREATED)
+
+class OrderHistoryView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    The user's orders, newest first, one page at a time. Line items come
+    from their checkout snapshot with a single prefetch; `?summary=1` lists
+    the orders alone with an item count instead.
+    """
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderPagination
+
+    def is_summary(self):
+        return self.request.query_params.get('summary', '').lower() in ('1', 'true')
+
+    def get_serializer_class(self):
+        return OrderSummarySerializer if self.is_summary() else OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
\ No newline at end of file
+        orders = Order.objects.filter(user=self.request.user)
+        if self.is_summary():
+            return orders.annotate(item_count=Count('items'))
+        return orders.prefetch_related('items')
+
+class OrderExportView(generics.GenericAPIView):
+    """Stream every order matching the filters as CSV or JSONL (`?output=`)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return OrderExporter().response(request)
+
+class OrderItemExportView(generics.GenericAPIView):
+    """Stream every order line matching the filters as CSV or JSONL (`?output=`)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return OrderItemExporter().response(request)
@@ -0,0 +1,99 @@
+"""
+Primary/replica routing.
+
+Writes always go to the primary ('default'). Reads go to a replica from
+`DATABASE_REPLICAS` only while a view that opted in with `ReplicaReadMixin`
+is handling the request; every other read (authentication, cart, checkout,
+admin, management commands) stays on the primary.
+
+After a user sends a write request they are pinned to the primary for
+`DATABASE_REPLICA_PIN_SECONDS`, so they read their own changes even while
+the replicas lag. The pin lives in the cache, which therefore has to be
+shared by all worker processes.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def _pin_key(user_id):
+    return 'db:pinned:%s' % user_id
+
+
+def pin_to_primary(user):
+    """Send `user`'s reads to the primary for the configured window."""
+    cache.set(_pin_key(user.pk), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user.pk)))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _read_from_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Serve the view's reads from a replica unless the request user is
+    pinned to the primary. Only for read-only (GET) views.
+    """
+    read_from_replica = False
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_from_replica.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_from_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Runs after authentication, so request.user is the real user.
+        super().initial(request, *args, **kwargs)
+        self.read_from_replica = (
+            bool(settings.DATABASE_REPLICAS)
+            and request.method in SAFE_METHODS
+            and not is_pinned(request.user)
+        )
+        _read_from_replica.set(self.read_from_replica)
+
+
+class PrimaryPinMiddleware:
+    """Pin users to the primary after any successful write request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            # DRF sets the authenticated (JWT) user back on the HttpRequest.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user)
+        return response
@@ -0,0 +1,325 @@
+"""
+Request instrumentation.
+
+`MetricsMiddleware` measures every request and files it under the name of
+the view it resolved to (`product-list`, `checkout`, `login`, ...):
+latency, SQL query count and time (on every database alias), time spent in
+serializers that include `TimedSerializerMixin`, and the response size.
+Each response carries the numbers in a `Server-Timing` header, and
+requests slower than `SLOW_REQUEST_SECONDS` are logged with their slowest
+statements.
+
+Each process keeps cumulative totals in memory and copies them to the cache
+every `METRICS_FLUSH_SECONDS`; the `/metrics` view adds up the copies of
+all live processes and renders them in the Prometheus text format. The
+last totals seen from processes that stopped are kept in a retired sum, so
+the counters never go down when a worker exits. The view answers only
+scrapes bearing METRICS_TOKEN, and none while that is unset. As with the
+product cache versions this needs a cache shared by the workers.
+"""
+
+import heapq
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.serializers import ListSerializer
+
+logger = logging.getLogger('ecofinds.slow_requests')
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROCESS_INDEX_KEY = 'metrics:processes'
+PROCESS_KEY_PREFIX = 'metrics:process:'
+# Snapshots of processes that stopped flushing drop out after this long
+PROCESS_TTL = 60 * 60
+# The snapshots the last scrape read, and the sum of those of processes
+# since gone; updated by one scrape at a time (RETIRE_LOCK_KEY).
+LAST_SEEN_KEY = 'metrics:last-seen'
+RETIRED_KEY = 'metrics:retired'
+RETIRE_LOCK_KEY = 'metrics:retire-lock'
+
+# Statements listed per slow request in the log
+SLOW_LOG_STATEMENTS = 10
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        # Min-heap of the slowest (seconds, sql), for the slow-request log
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper() around the request.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if len(self.statements) < SLOW_LOG_STATEMENTS:
+                heapq.heappush(self.statements, (elapsed, sql))
+            elif elapsed > self.statements[0][0]:
+                heapq.heapreplace(self.statements, (elapsed, sql))
+
+
+def _timed(serialize):
+    # Only the outermost timed serializer counts; nested ones run inside it.
+    metrics = _current.get()
+    if metrics is None:
+        return serialize()
+    _current.set(None)
+    started = time.perf_counter()
+    try:
+        return serialize()
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+        _current.set(metrics)
+
+
+class TimedSerializerMixin:
+    """Counts the time spent producing `.data` as serializer time, also with `many=True`."""
+
+    @property
+    def data(self):
+        return _timed(lambda: super(TimedSerializerMixin, self).data)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        serializer = super().many_init(*args, **kwargs)
+        if type(serializer) is ListSerializer:
+            serializer.__class__ = TimedListSerializer
+        return serializer
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
+
+
+def _new_view_stats():
+    return {
+        'count': 0,
+        'buckets': [0] * len(LATENCY_BUCKETS),
+        'seconds': 0.0,
+        'queries': 0,
+        'db_seconds': 0.0,
+        'serializer_seconds': 0.0,
+        'response_bytes': 0,
+        'slow': 0,
+        'status': {},
+    }
+
+
+class Registry:
+    """Cumulative per-view totals of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.last_flush = time.monotonic()
+
+    def observe(self, view, status_code, seconds, metrics, response_bytes, slow):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = _new_view_stats()
+            stats['count'] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+            stats['seconds'] += seconds
+            stats['queries'] += metrics.queries
+            stats['db_seconds'] += metrics.db_time
+            stats['serializer_seconds'] += metrics.serializer_time
+            stats['response_bytes'] += response_bytes
+            stats['slow'] += int(slow)
+            status_class = '%dxx' % (status_code // 100)
+            stats['status'][status_class] = stats['status'].get(status_class, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: dict(stats, buckets=list(stats['buckets']), status=dict(stats['status']))
+                for view, stats in self.views.items()
+            }
+
+    def flush(self, force=False):
+        """Copy this process's totals to the shared cache."""
+        now = time.monotonic()
+        if not force and now - self.last_flush < settings.METRICS_FLUSH_SECONDS:
+            return
+        self.last_flush = now
+        key = '%s%s:%d' % (PROCESS_KEY_PREFIX, socket.gethostname(), os.getpid())
+        cache.set(key, self.snapshot(), PROCESS_TTL)
+        processes = cache.get(PROCESS_INDEX_KEY) or []
+        if key not in processes:
+            # Racing registrations can drop a key; it is re-added next flush.
+            cache.set(PROCESS_INDEX_KEY, processes + [key], None)
+
+
+registry = Registry()
+
+
+def _add(totals, snapshot):
+    for view, stats in snapshot.items():
+        total = totals.get(view)
+        if total is None:
+            total = totals[view] = _new_view_stats()
+        for field, value in stats.items():
+            if field == 'buckets':
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], value)]
+            elif field == 'status':
+                for status_class, count in value.items():
+                    total['status'][status_class] = total['status'].get(status_class, 0) + count
+            else:
+                total[field] += value
+
+
+def collect():
+    """
+    Totals per view: those of every process that flushed within
+    PROCESS_TTL, plus the last ones seen from processes that stopped.
+    """
+    registry.flush(force=True)
+    processes = cache.get(PROCESS_INDEX_KEY) or []
+    snapshots = cache.get_many(processes)
+    if cache.add(RETIRE_LOCK_KEY, True, 60):
+        try:
+            last_seen = cache.get(LAST_SEEN_KEY) or {}
+            retired = cache.get(RETIRED_KEY) or {}
+            gone = [key for key in processes if key not in snapshots]
+            for key in gone:
+                if key in last_seen:
+                    _add(retired, last_seen.pop(key))
+            if gone:
+                cache.set(RETIRED_KEY, retired, None)
+                cache.set(PROCESS_INDEX_KEY, [key for key in processes if key in snapshots], None)
+            last_seen.update(snapshots)
+            cache.set(LAST_SEEN_KEY, last_seen, None)
+        finally:
+            cache.delete(RETIRE_LOCK_KEY)
+    else:
+        # Another scrape is retiring processes; report what it last stored.
+        retired = cache.get(RETIRED_KEY) or {}
+
+    totals = {}
+    _add(totals, retired)
+    for snapshot in snapshots.values():
+        _add(totals, snapshot)
+    return totals
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(totals):
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, kind))
+
+    views = sorted(totals)
+
+    family('ecofinds_request_duration_seconds', 'histogram', 'Request latency per view.')
+    for view in views:
+        stats, label = totals[view], _label(view)
+        for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+            lines.append('ecofinds_request_duration_seconds_bucket{view="%s",le="%s"} %d' % (label, bound, count))
+        lines.append('ecofinds_request_duration_seconds_bucket{view="%s",le="+Inf"} %d' % (label, stats['count']))
+        lines.append('ecofinds_request_duration_seconds_sum{view="%s"} %r' % (label, stats['seconds']))
+        lines.append('ecofinds_request_duration_seconds_count{view="%s"} %d' % (label, stats['count']))
+
+    family('ecofinds_requests_total', 'counter', 'Requests per view and status class.')
+    for view in views:
+        for status_class, count in sorted(totals[view]['status'].items()):
+            lines.append('ecofinds_requests_total{view="%s",status="%s"} %d' % (_label(view), status_class, count))
+
+    counters = (
+        ('ecofinds_db_queries_total', 'queries', 'SQL statements executed per view.'),
+        ('ecofinds_db_duration_seconds_total', 'db_seconds', 'Time spent in SQL per view.'),
+        ('ecofinds_serializer_duration_seconds_total', 'serializer_seconds', 'Time spent serializing responses per view.'),
+        ('ecofinds_response_size_bytes_total', 'response_bytes', 'Response body bytes per view.'),
+        ('ecofinds_slow_requests_total', 'slow', 'Requests slower than SLOW_REQUEST_SECONDS per view.'),
+    )
+    for name, field, help_text in counters:
+        family(name, 'counter', help_text)
+        for view in views:
+            lines.append('%s{view="%s"} %r' % (name, _label(view), totals[view][field]))
+
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires `Bearer METRICS_TOKEN`, and is closed without one."""
+    token = settings.METRICS_TOKEN
+    if not token or request.headers.get('Authorization') != 'Bearer %s' % token:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        # For streaming responses (exports) this stops once the body
+        # generator is handed back, before it is consumed.
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.view_name or match._func_path) if match else 'unresolved'
+        if response.streaming:
+            response_bytes = int(response.get('Content-Length') or 0)
+        else:
+            response_bytes = len(response.content)
+        slow = elapsed >= settings.SLOW_REQUEST_SECONDS
+
+        response['Server-Timing'] = ', '.join([
+            'app;dur=%.1f' % (elapsed * 1000),
+            'db;dur=%.1f;desc="%d queries"' % (metrics.db_time * 1000, metrics.queries),
+            'ser;dur=%.1f' % (metrics.serializer_time * 1000),
+        ])
+        if slow:
+            self.log_slow_request(request, view, response, elapsed, metrics)
+
+        registry.observe(view, response.status_code, elapsed, metrics, response_bytes, slow)
+        registry.flush()
+        return response
+
+    @staticmethod
+    def log_slow_request(request, view, response, elapsed, metrics):
+        slowest = sorted(metrics.statements, reverse=True)
+        logger.warning(
+            'Slow request %s %s (%s) -> %s in %.0fms: %d queries in %.0fms, serializers %.0fms\n%s',
+            request.method, request.get_full_path(), view, response.status_code, elapsed * 1000,
+            metrics.queries, metrics.db_time * 1000, metrics.serializer_time * 1000,
+            '\n'.join('  %.1fms  %s' % (seconds * 1000, sql) for seconds, sql in slowest),
+        )
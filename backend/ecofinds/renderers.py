@@ -0,0 +1,38 @@
+"""
+JSON renderer backed by orjson.
+
+`FastJSONRenderer` produces the same bytes as DRF's JSONRenderer with the
+default settings (compact separators, UTF-8 output, U+2028/U+2029 escaped)
+but encodes in C. Values orjson would format differently from DRF's
+encoder, such as datetimes and Decimals, are handed to that encoder.
+Indented output, non-default JSON settings, and data orjson rejects go
+through JSONRenderer unchanged, as does everything when orjson is not
+installed.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
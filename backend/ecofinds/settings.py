@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ecofinds.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -36,6 +37,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ecofinds.db_router.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'ecofinds.urls'
@@ -74,6 +76,41 @@ DATABASES = {
     }
 }
 
+# Read replicas (comma-separated hosts, same credentials as the primary).
+# Product, category and order-history reads are spread across them by
+# ecofinds.db_router; any other read and every write uses the primary.
+# Locally, point DATABASES at two SQLite files and list the second alias in
+# DATABASE_REPLICAS to try it out.
+DATABASE_REPLICAS = []
+for number, host in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    alias = 'replica_%d' % number
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['ecofinds.db_router.PrimaryReplicaRouter']
+
+# How long a user's reads stay on the primary after they write; should
+# exceed the worst expected replication lag.
+DATABASE_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Cache Configuration
+# Use a shared backend (e.g. django.core.cache.backends.redis.RedisCache) in
+# production so version bumps are seen by every worker process.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ecofinds'),
+    }
+}
+
+# Upper bound on how long superseded product responses stay in the cache;
+# freshness is handled by version bumps, not by this TTL.
+PRODUCT_CACHE_TIMEOUT = config('PRODUCT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Serve unsearched feed pages from the denormalized ProductListing table.
+# Run `manage.py rebuild_listings` once before turning this on.
+PRODUCT_FEED_FROM_LISTINGS = config('PRODUCT_FEED_FROM_LISTINGS', default=False, cast=bool)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,6 +137,39 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Bulk product import: rows per INSERT/transaction, and the server-side
+# directory that image file names in uploaded imports are resolved against
+PRODUCT_IMPORT_CHUNK_SIZE = config('PRODUCT_IMPORT_CHUNK_SIZE', default=500, cast=int)
+PRODUCT_IMPORT_IMAGE_DIR = config('PRODUCT_IMPORT_IMAGE_DIR', default=None)
+
+# Background threads that build resized product image renditions
+IMAGE_RENDITION_WORKERS = config('IMAGE_RENDITION_WORKERS', default=2, cast=int)
+
+# Similar products index (products/similar.py): where `rebuild_similar_index`
+# writes its builds, the vector width (4 bytes per dimension per product),
+# how often each process folds in changed products, the delta size at which
+# it asks for a rebuild, and the rows per k-means partition of a large
+# category and how many of a category's partitions a lookup scans
+SIMILAR_PRODUCTS_INDEX_DIR = config('SIMILAR_PRODUCTS_INDEX_DIR', default=os.path.join(BASE_DIR, 'var', 'similar'))
+SIMILAR_PRODUCTS_DIMENSIONS = config('SIMILAR_PRODUCTS_DIMENSIONS', default=128, cast=int)
+SIMILAR_PRODUCTS_REFRESH_SECONDS = config('SIMILAR_PRODUCTS_REFRESH_SECONDS', default=30, cast=int)
+SIMILAR_PRODUCTS_DELTA_WARNING = config('SIMILAR_PRODUCTS_DELTA_WARNING', default=50000, cast=int)
+SIMILAR_PRODUCTS_PARTITION_SIZE = config('SIMILAR_PRODUCTS_PARTITION_SIZE', default=20000, cast=int)
+SIMILAR_PRODUCTS_PROBES = config('SIMILAR_PRODUCTS_PROBES', default=3, cast=int)
+
+# Search box suggestions (products/autocomplete.py): how often each process
+# folds changed products into its index, and rebuilds it from scratch
+AUTOCOMPLETE_REFRESH_SECONDS = config('AUTOCOMPLETE_REFRESH_SECONDS', default=10, cast=int)
+AUTOCOMPLETE_REBUILD_SECONDS = config('AUTOCOMPLETE_REBUILD_SECONDS', default=3600, cast=int)
+
+# Request instrumentation (ecofinds/metrics.py): requests at least this slow
+# are logged with their slowest SQL; per-process totals are published to the
+# cache this often for /metrics, which requires `Bearer METRICS_TOKEN` (and
+# answers 403 while it is unset).
+SLOW_REQUEST_SECONDS = config('SLOW_REQUEST_SECONDS', default=1.0, cast=float)
+METRICS_FLUSH_SECONDS = config('METRICS_FLUSH_SECONDS', default=10, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default=None)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model
@@ -107,7 +177,7 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -120,6 +190,15 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# How long units added to a cart stay reserved for the buyer
+CART_RESERVATION_TTL = timedelta(minutes=config('CART_RESERVATION_MINUTES', default=15, cast=int))
+
+# Seconds an authenticated user is served from the cache instead of MySQL
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+# Build request.user from JWT claims alone (no cache or DB lookup at all);
+# deactivation and staff changes then apply once the access token expires
+AUTH_USER_FROM_TOKEN_CLAIMS = config('AUTH_USER_FROM_TOKEN_CLAIMS', default=False, cast=bool)
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .inventory import update_stock
 from .models import Category, Product, ProductImage
 
 @admin.register(Category)
@@ -15,4 +16,13 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ['title', 'price', 'category', 'seller', 'is_available', 'created_at']
     list_filter = ['category', 'condition', 'is_available', 'created_at']
     search_fields = ['title', 'description']
-    inlines = [ProductImageInline]
\ No newline at end of file
+    inlines = [ProductImageInline]
+
+    def save_model(self, request, obj, form, change):
+        stock = {field: form.cleaned_data[field] for field in ('quantity', 'is_available') if field in form.changed_data}
+        if change and stock:
+            # Product.save() leaves stock alone on existing rows; move it from
+            # what the form showed.
+            obj.quantity = form.initial['quantity']
+            update_stock(obj, **stock)
+        super().save_model(request, obj, form, change)
\ No newline at end of file
@@ -0,0 +1,333 @@
+"""
+Search box suggestions from an in-memory prefix index.
+
+Suggestions are the distinct titles and brands of listed products and the
+category names. They are ranked by popularity: for a title or brand, the
+number of available listings with it plus the units of it sold; for a
+category, its `available_products_count` plus `sold_products_count`. Text
+is matched case- and punctuation-insensitively against the start of a
+suggestion or of any of its first WORD_STARTS words, so "iph" suggests
+"Apple iPhone 12". Suggestions with no available listing are not offered.
+
+The index is sorted arrays: every (key, suggestion) entry in one numpy
+byte-string array, searched for the range of keys starting with what was
+typed, and the suggestions' scores in a numpy array, so the best of a range
+is one argpartition. The shortest prefixes match the most entries; their
+top suggestions are kept precomputed. Each process builds the index in
+a background thread on first use, then every AUTOCOMPLETE_REFRESH_SECONDS
+a background thread folds in the products updated since: listing counts
+change in place and text not seen before goes into a small overlay array.
+Every AUTOCOMPLETE_REBUILD_SECONDS it is rebuilt from scratch, which also
+picks up deleted products and new sales. Lookups never touch the database.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Category, Product
+
+logger = logging.getLogger(__name__)
+
+TITLE, BRAND, CATEGORY = 'title', 'brand', 'category'
+# Word positions of a suggestion that typing can start at
+WORD_STARTS = 4
+# Stored bytes of each key; longer input is checked against the whole key
+KEY_BYTES = 32
+KEY_DTYPE = 'S%d' % KEY_BYTES
+MAX_SUGGESTIONS = 20
+# Prefixes matching more entries than this keep their top suggestions
+LARGE_RANGE = 2000
+
+# Each refresh re-reads changes this far before the newest one it has seen,
+# for transactions that committed after a later one was read.
+REFRESH_OVERLAP = timedelta(minutes=2)
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Lowercased words of `text`, separated by single spaces."""
+    return ' '.join(TOKEN_RE.findall(text.casefold()))
+
+
+def _probe(key):
+    # One byte short of KEY_BYTES, so the range's upper bound fits the dtype
+    return key.encode()[:KEY_BYTES - 1]
+
+
+def _entries(key):
+    words = key.split(' ')
+    return {' '.join(words[i:]).encode()[:KEY_BYTES] for i in range(min(len(words), WORD_STARTS))}
+
+
+def _sorted_entries(pairs):
+    keys = np.array([key for key, _ in pairs], dtype=KEY_DTYPE)
+    ids = np.array([sid for _, sid in pairs], dtype=np.int32)
+    order = np.argsort(keys, kind='stable')
+    return keys[order], ids[order]
+
+
+class PrefixIndex:
+    """Suggestions with their listing counts, and their sorted entries."""
+
+    def __init__(self, since):
+        # Per suggestion id
+        self.texts, self.kinds, self.keys = [], [], []
+        self.listed = np.zeros(0, dtype=np.int64)
+        self.sold = np.zeros(0, dtype=np.int64)
+        self.score = np.zeros(0, dtype=np.int64)
+        self.ids = {}
+        self.entries = _sorted_entries([])
+        # Entries of suggestions first seen after the build
+        self.extra = _sorted_entries([])
+        self.extra_pairs = []
+        # (title id, brand id) of each listed product; -1 for no brand
+        self.product_ids = np.zeros(0, dtype=np.int64)
+        self.product_text = np.zeros((0, 2), dtype=np.int32)
+        self.product_listed = np.zeros(0, dtype=bool)
+        self.new_products = {}
+        self.categories = {}
+        self.popular = {}
+        self.since = since
+        self.built_at = self.checked_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _suggestion(self, kind, text):
+        key = normalize(text)
+        if not key:
+            return -1
+        sid = self.ids.get((kind, key))
+        if sid is None:
+            sid = self.ids[(kind, key)] = len(self.texts)
+            self.texts.append(' '.join(text.split()))
+            self.kinds.append(kind)
+            self.keys.append(key)
+        return sid
+
+    def _grow(self):
+        missing = len(self.texts) - len(self.score)
+        if missing:
+            self.listed = np.concatenate([self.listed, np.zeros(missing, dtype=np.int64)])
+            self.sold = np.concatenate([self.sold, np.zeros(missing, dtype=np.int64)])
+            self.score = np.concatenate([self.score, np.zeros(missing, dtype=np.int64)])
+
+    def _rescore(self, sids):
+        sids = np.fromiter(sids, dtype=np.int64)
+        sids = sids[sids >= 0]
+        self.score[sids] = np.where(self.listed[sids] > 0, self.listed[sids] + self.sold[sids], 0)
+
+    @classmethod
+    def build(cls):
+        from cart.models import OrderItem
+
+        # Taken before reading, so changes made during the build are picked
+        # up by the first refresh.
+        index = cls(timezone.now())
+        listed = Counter()
+        product_ids, product_text = [], []
+        products = Product.objects.filter(is_available=True).order_by('id').values_list('id', 'title', 'brand')
+        for pk, title, brand in products.iterator(chunk_size=5000):
+            text = (index._suggestion(TITLE, title), index._suggestion(BRAND, brand))
+            product_ids.append(pk)
+            product_text.append(text)
+            listed.update(sid for sid in text if sid >= 0)
+
+        sold = Counter()
+        lines = OrderItem.objects.order_by()
+        for kind, column, queryset in (
+            (TITLE, 'product_title', lines),
+            (BRAND, 'product__brand', lines.filter(product__isnull=False)),
+        ):
+            for text, units in queryset.values_list(column).annotate(units=Sum('quantity')):
+                sid = index.ids.get((kind, normalize(text)))
+                if sid is not None:
+                    sold[sid] += units
+
+        index._grow()
+        index.listed[list(listed)] = list(listed.values())
+        index.sold[list(sold)] = list(sold.values())
+        index.product_ids = np.array(product_ids, dtype=np.int64)
+        index.product_text = np.array(product_text, dtype=np.int32).reshape(-1, 2)
+        index.product_listed = np.ones(len(product_ids), dtype=bool)
+        index._update_categories(Category.objects.values_list('id', 'name', 'available_products_count', 'sold_products_count'))
+        index.entries = _sorted_entries([
+            (entry, sid) for sid, key in enumerate(index.keys) for entry in _entries(key)
+        ])
+        index._rescore(range(len(index.texts)))
+        return index
+
+    def _update_categories(self, rows):
+        """Set the category suggestions' counts; returns the suggestion ids changed."""
+        rows = [(pk, self._suggestion(CATEGORY, name), available, sold) for pk, name, available, sold in rows]
+        self._grow()
+        changed = set()
+        seen = set()
+        for pk, sid, available, sold in rows:
+            previous = self.categories.get(pk)
+            if previous is not None and previous >= 0 and previous != sid:
+                # Renamed
+                self.listed[previous] = self.sold[previous] = 0
+                changed.add(previous)
+            self.categories[pk] = sid
+            seen.add(pk)
+            if sid >= 0 and (self.listed[sid], self.sold[sid]) != (available, sold):
+                self.listed[sid], self.sold[sid] = available, sold
+                changed.add(sid)
+        for pk in set(self.categories) - seen:
+            sid = self.categories.pop(pk)
+            if sid >= 0:
+                self.listed[sid] = self.sold[sid] = 0
+                changed.add(sid)
+        return changed
+
+    def _product(self, pk):
+        """(title id, brand id) of a listed product, or None."""
+        i = int(np.searchsorted(self.product_ids, pk))
+        if i < len(self.product_ids) and self.product_ids[i] == pk:
+            return tuple(self.product_text[i].tolist()) if self.product_listed[i] else None
+        return self.new_products.get(pk)
+
+    def _set_product(self, pk, text):
+        i = int(np.searchsorted(self.product_ids, pk))
+        if i < len(self.product_ids) and self.product_ids[i] == pk:
+            self.product_listed[i] = text is not None
+            if text is not None:
+                self.product_text[i] = text
+        elif text is None:
+            self.new_products.pop(pk, None)
+        else:
+            self.new_products[pk] = text
+
+    def refresh(self):
+        """Fold in the products updated since the last refresh, and the category counters."""
+        rows = list(
+            Product.objects.filter(updated_at__gte=self.since - REFRESH_OVERLAP)
+                           .values_list('id', 'title', 'brand', 'is_available', 'updated_at')
+        )
+        categories = list(Category.objects.values_list('id', 'name', 'available_products_count', 'sold_products_count'))
+        with self.lock:
+            first_new = len(self.texts)
+            updates = [
+                (pk, (self._suggestion(TITLE, title), self._suggestion(BRAND, brand)) if is_available else None)
+                for pk, title, brand, is_available, _ in rows
+            ]
+            changed = self._update_categories(categories)
+            listed = Counter()
+            for pk, text in updates:
+                previous = self._product(pk)
+                if previous != text:
+                    listed.subtract(sid for sid in previous or () if sid >= 0)
+                    listed.update(sid for sid in text or () if sid >= 0)
+                    self._set_product(pk, text)
+            if listed:
+                np.add.at(self.listed, list(listed), list(listed.values()))
+                changed.update(listed)
+            if len(self.texts) > first_new:
+                self.extra_pairs.extend(
+                    (entry, sid) for sid in range(first_new, len(self.texts)) for entry in _entries(self.keys[sid])
+                )
+                self.extra = _sorted_entries(self.extra_pairs)
+            if changed:
+                self._rescore(changed)
+                self.popular = {probe: self._best(self._range(probe)) for probe in list(self.popular)}
+            if rows:
+                self.since = max(self.since, max(row[4] for row in rows))
+
+    def _range(self, probe):
+        """Suggestion ids of the entries starting with `probe`, with repeats."""
+        ranges = []
+        for keys, ids in (self.entries, self.extra):
+            start = np.searchsorted(keys, probe, side='left')
+            end = np.searchsorted(keys, probe + b'\xff', side='left')
+            ranges.append(ids[start:end])
+        return np.concatenate(ranges)
+
+    def _best(self, ids):
+        """The MAX_SUGGESTIONS best-scoring distinct suggestions among `ids`."""
+        score = self.score
+        # A suggestion has at most WORD_STARTS entries in a range.
+        keep = MAX_SUGGESTIONS * WORD_STARTS
+        if len(ids) > keep:
+            ids = ids[np.argpartition(-score[ids], keep - 1)[:keep]]
+        ranked = sorted(
+            {int(sid) for sid in ids if score[sid] > 0},
+            key=lambda sid: (-score[sid], len(self.texts[sid]), self.texts[sid]),
+        )
+        return ranked[:MAX_SUGGESTIONS]
+
+    def suggest(self, text, limit):
+        """Up to `limit` `{'text', 'type'}` suggestions for what was typed, best first."""
+        key = normalize(text)
+        if not key:
+            return []
+        probe = _probe(key)
+        if len(key.encode()) >= KEY_BYTES - 1:
+            # Only the start of the input was compared; drop the suggestions
+            # it does not match before ranking, so `limit` can still be met.
+            ids = np.unique(self._range(probe))
+            matches = [any(entry.startswith(key) for entry in self._word_starts(sid)) for sid in ids]
+            best = self._best(ids[np.array(matches, dtype=bool)])
+        else:
+            with self.lock:
+                best = self.popular.get(probe)
+            if best is None:
+                ids = self._range(probe)
+                best = self._best(ids)
+                if len(ids) > LARGE_RANGE:
+                    # refresh() rebuilds `popular` under the same lock.
+                    with self.lock:
+                        self.popular[probe] = best
+        return [{'text': self.texts[sid], 'type': self.kinds[sid]} for sid in best[:limit]]
+
+    def _word_starts(self, sid):
+        words = self.keys[sid].split(' ')
+        return (' '.join(words[i:]) for i in range(min(len(words), WORD_STARTS)))
+
+
+_index = None
+_index_lock = threading.Lock()
+_updating = False
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autocomplete')
+
+
+def _update():
+    global _index, _updating
+    try:
+        index = _index
+        if index is None or time.monotonic() - index.built_at >= settings.AUTOCOMPLETE_REBUILD_SECONDS:
+            _index = PrefixIndex.build()
+        else:
+            index.refresh()
+            index.checked_at = time.monotonic()
+    except Exception:
+        logger.exception('Failed to update the autocomplete index')
+    finally:
+        _updating = False
+        close_old_connections()
+
+
+def get_index():
+    """
+    This process's index, or None while the first build is running. The
+    build, refreshes and rebuilds run in a background thread while the
+    current index keeps answering.
+    """
+    global _updating
+    with _index_lock:
+        index = _index
+        due = index is None or time.monotonic() - index.checked_at >= settings.AUTOCOMPLETE_REFRESH_SECONDS
+        if due and not _updating:
+            _updating = True
+            _executor.submit(_update)
+        return index
@@ -0,0 +1,120 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'products:version:'
+
+
+def _timestamp_ms(when=None):
+    return int((when or timezone.now()).timestamp() * 1000)
+
+
+def get_versions(*names):
+    """
+    Current version of each cache namespace.
+
+    A version is the millisecond timestamp of the last change in that
+    namespace, so it doubles as the Last-Modified value. Namespaces the cache
+    has never seen (or has evicted) start at "now", which can only make
+    responses look newer, never serve stale entries.
+    """
+    keys = [VERSION_KEY_PREFIX + name for name in names]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = _timestamp_ms()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump_versions(*names, when=None):
+    """Invalidate every cached response that depends on `names`."""
+    ts = _timestamp_ms(when)
+    keys = [VERSION_KEY_PREFIX + name for name in names]
+    current = cache.get_many(keys)
+    cache.set_many(
+        {key: max(ts, current.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def response_cache_key(view_name, request, path, params, names, versions):
+    """Cache key of a GET response of `view_name` for `path` and sorted query `params`."""
+    raw_key = '|'.join([
+        view_name,
+        request.scheme,
+        request.get_host(),
+        path,
+        repr(params),
+        ','.join('%s=%s' % pair for pair in zip(names, versions)),
+    ])
+    return 'products:response:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+
+def may_be_stale(read_from_replica, versions):
+    # A replica may not have replayed a change that recent yet, and an
+    # entry cached now would outlive the lag under the new version.
+    if not read_from_replica:
+        return False
+    return _timestamp_ms() - max(versions) < settings.DATABASE_REPLICA_PIN_SECONDS * 1000
+
+
+class CachedResponseMixin:
+    """
+    Serve GET responses from the cache, keyed on the versions of the
+    namespaces the view depends on, and answer conditional requests.
+
+    Because versions are bumped by model signals the entries never need a
+    TTL to stay fresh; `PRODUCT_CACHE_TIMEOUT` only bounds how long
+    superseded entries linger. The ETag is a hash of the cache key, so a
+    matching If-None-Match gets a 304 without loading the cached body.
+    """
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get(self, request, *args, **kwargs):
+        names = self.get_cache_namespaces()
+        versions = get_versions(*names)
+        params = sorted(request.query_params.lists())
+        key = response_cache_key(self.__class__.__name__, request, request.path, params, names, versions)
+        etag = quote_etag(key.rsplit(':', 1)[1])
+        last_modified = datetime.fromtimestamp(max(versions) / 1000, tz=dt_timezone.utc)
+
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(key)
+            if data is None:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                data = response.data
+                if not self.may_be_stale(versions):
+                    cache.set(key, data, settings.PRODUCT_CACHE_TIMEOUT)
+            response = Response(data)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def may_be_stale(self, versions):
+        return may_be_stale(getattr(self, 'read_from_replica', False), versions)
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return if_modified_since is not None and int(last_modified.timestamp()) <= if_modified_since
@@ -0,0 +1,126 @@
+"""
+Denormalized listing counters on Category and the seller (User).
+
+`available_products_count` is the number of listed products, and
+`sold_products_count` the number of units sold through checkout. Both are
+only ever changed with relative `F()` updates, one statement per table,
+inside the transaction that made the change, so concurrent writers never
+overwrite each other. `reconcile_counters()` recomputes them from the
+product and order tables to repair any drift.
+"""
+
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .cache import bump_versions
+from .models import Category, Product
+
+COUNTER_FIELDS = ('available_products_count', 'sold_products_count')
+
+
+class CounterDeltas:
+    """Accumulates counter changes per category and seller before applying them."""
+
+    def __init__(self):
+        self.categories = defaultdict(Counter)
+        self.sellers = defaultdict(Counter)
+
+    def listed(self, category_id, seller_id, units=1):
+        self.categories[category_id]['available_products_count'] += units
+        self.sellers[seller_id]['available_products_count'] += units
+
+    def delisted(self, category_id, seller_id, units=1):
+        self.listed(category_id, seller_id, -units)
+
+    def sold(self, category_id, seller_id, units):
+        self.categories[category_id]['sold_products_count'] += units
+        self.sellers[seller_id]['sold_products_count'] += units
+
+    def apply(self):
+        categories = _apply(Category, self.categories)
+        _apply(get_user_model(), self.sellers)
+        if categories:
+            transaction.on_commit(lambda: bump_versions('categories'))
+
+
+def _apply(model, deltas):
+    """One UPDATE adding every non-zero delta; returns the touched pks."""
+    updates, pks = {}, set()
+    for field in COUNTER_FIELDS:
+        whens = [When(pk=pk, then=Value(delta[field])) for pk, delta in deltas.items() if delta[field]]
+        if whens:
+            updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+            pks.update(pk for pk, delta in deltas.items() if delta[field])
+    if updates:
+        model.objects.filter(pk__in=pks).update(**updates)
+    return pks
+
+
+def products_listed(rows, sign=1):
+    """Apply +1 (or -1) per `(category_id, seller_id)` pair in `rows`."""
+    deltas = CounterDeltas()
+    for category_id, seller_id in rows:
+        deltas.listed(category_id, seller_id, sign)
+    deltas.apply()
+
+
+def reconcile_counters(batch_size=1000):
+    """
+    Recompute every counter from the source tables, `batch_size` primary
+    keys per locked batch, and return how many categories and users were
+    corrected. Sales are attributed through the seller and category stored
+    on each order line, so like the live counters they keep the units of
+    listings deleted since.
+    """
+    from cart.models import OrderItem
+
+    available = Product.objects.filter(is_available=True).order_by().values('pk')
+    sold = OrderItem.objects.order_by().values('pk')
+    category_counts = {
+        'available_products_count': available.filter(category=OuterRef('pk')).values('category').annotate(n=Count('pk')).values('n'),
+        'sold_products_count': sold.filter(category=OuterRef('pk')).values('category').annotate(n=Sum('quantity')).values('n'),
+    }
+    seller_counts = {
+        'available_products_count': available.filter(seller=OuterRef('pk')).values('seller').annotate(n=Count('pk')).values('n'),
+        'sold_products_count': sold.filter(seller=OuterRef('pk')).values('seller').annotate(n=Sum('quantity')).values('n'),
+    }
+    fixed = {}
+    for name, model, counts in (('categories', Category, category_counts), ('users', get_user_model(), seller_counts)):
+        fixed[name] = _reconcile(model, counts, batch_size)
+    if fixed['categories']:
+        bump_versions('categories')
+    return fixed
+
+
+def _reconcile(model, counts, batch_size):
+    expected = {
+        field: Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+        for field, subquery in counts.items()
+    }
+    fixed = 0
+    last_pk = 0
+    top = model.objects.aggregate(top=Max('pk'))['top'] or 0
+    while last_pk < top:
+        batch = model.objects.filter(pk__gt=last_pk, pk__lte=last_pk + batch_size)
+        with transaction.atomic():
+            rows = list(
+                batch.select_for_update()
+                     .annotate(expected_available=expected['available_products_count'],
+                               expected_sold=expected['sold_products_count'])
+                     .values_list('pk', 'available_products_count', 'sold_products_count',
+                                  'expected_available', 'expected_sold')
+            )
+            wrong = {pk: (available, sold) for pk, current_available, current_sold, available, sold in rows
+                     if (current_available, current_sold) != (available, sold)}
+            if wrong:
+                model.objects.filter(pk__in=wrong).update(
+                    available_products_count=Case(*[When(pk=pk, then=Value(values[0])) for pk, values in wrong.items()], output_field=IntegerField()),
+                    sold_products_count=Case(*[When(pk=pk, then=Value(values[1])) for pk, values in wrong.items()], output_field=IntegerField()),
+                )
+                fixed += len(wrong)
+        last_pk += batch_size
+    return fixed
@@ -0,0 +1,140 @@
+"""
+Streaming CSV/JSONL exports.
+
+Rows are read in primary-key order, `chunk_size` at a time, with a keyset
+`WHERE pk > last` query per chunk and written out as they arrive. This keeps
+memory flat even on MySQL, whose driver buffers the entire result set of a
+single query (so `.iterator()` alone would not).
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+
+from .models import Product
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class Exporter:
+    name = None
+    model = None
+    # (column header, values_list() lookup)
+    columns = ()
+    filterset_class = None
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def filter_queryset(self, params):
+        filterset = self.filterset_class(params, queryset=self.get_queryset())
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    def rows(self, queryset, chunk_size):
+        lookups = [lookup for _, lookup in self.columns]
+        queryset = queryset.order_by('pk')
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(page.values_list('pk', *lookups)[:chunk_size])
+            if not chunk:
+                return
+            for row in chunk:
+                yield row[1:]
+            last_pk = chunk[-1][0]
+
+    def stream(self, queryset, fmt, chunk_size=2000):
+        """Yield the export as text, one chunk of `chunk_size` rows at a time."""
+        headers = [header for header, _ in self.columns]
+        if fmt == 'csv':
+            writer = csv.writer(_Echo())
+            yield writer.writerow(headers)
+            encode = writer.writerow
+        elif fmt == 'jsonl':
+            def encode(row):
+                return json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+        else:
+            raise ValueError(f'Unsupported export format "{fmt}".')
+
+        lines = []
+        for row in self.rows(queryset, chunk_size):
+            lines.append(encode(row))
+            if len(lines) >= chunk_size:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    def write(self, output, params, fmt, chunk_size=2000):
+        """Write the export to the text file `output`; returns the number of chunks."""
+        queryset = self.filter_queryset(params)
+        chunks = 0
+        for chunk in self.stream(queryset, fmt, chunk_size):
+            output.write(chunk)
+            chunks += 1
+        return chunks
+
+    def response(self, request, chunk_size=2000):
+        """StreamingHttpResponse for `request`, filtered by its query parameters."""
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in FORMATS:
+            raise ValidationError({'output': [f'Must be one of: {", ".join(FORMATS)}.']})
+        queryset = self.filter_queryset(request.query_params)
+        response = StreamingHttpResponse(self.stream(queryset, fmt, chunk_size), content_type=FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{self.name}.{fmt}"'
+        return response
+
+
+class ProductExportFilter(filters.FilterSet):
+    seller = filters.NumberFilter(field_name='seller_id')
+    created_after = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Product
+        fields = ['seller', 'category', 'condition', 'is_available', 'created_after', 'created_before']
+
+
+class ProductExporter(Exporter):
+    name = 'products'
+    model = Product
+    columns = (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('price', 'price'),
+        ('quantity', 'quantity'),
+        ('category', 'category__name'),
+        ('condition', 'condition'),
+        ('brand', 'brand'),
+        ('model', 'model'),
+        ('year_of_manufacture', 'year_of_manufacture'),
+        ('material', 'material'),
+        ('color', 'color'),
+        ('length', 'length'),
+        ('width', 'width'),
+        ('height', 'height'),
+        ('weight', 'weight'),
+        ('seller_id', 'seller_id'),
+        ('seller', 'seller__username'),
+        ('is_available', 'is_available'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+    filterset_class = ProductExportFilter
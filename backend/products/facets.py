@@ -0,0 +1,62 @@
+from django.db.models import Count, Q
+
+from .models import Product
+
+# (lower bound inclusive, upper bound exclusive); None means unbounded.
+PRICE_BUCKETS = [
+    (None, 25),
+    (25, 50),
+    (50, 100),
+    (100, 250),
+    (250, 500),
+    (500, None),
+]
+
+
+def _price_bucket_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def compute_facets(queryset, category_name='category__name'):
+    """
+    Facet counts for an already filtered product queryset. `category_name`
+    is the lookup of the category's name (`category_name` on ProductListing).
+
+    One GROUP BY per grouped facet plus a single conditional aggregate for
+    all price buckets, so the cost is three queries however many distinct
+    categories, conditions or buckets there are.
+    """
+    # Drop ordering (it would leak into GROUP BY) and the listing joins.
+    base = queryset.order_by().select_related(None).prefetch_related(None)
+
+    categories = [
+        {'id': row['category'], 'name': row[category_name], 'count': row['count']}
+        for row in base.values('category', category_name)
+                       .annotate(count=Count('id'))
+                       .order_by('-count', category_name)
+    ]
+
+    condition_counts = dict(
+        base.values_list('condition').annotate(count=Count('id')).order_by()
+    )
+    conditions = [
+        {'value': value, 'label': label, 'count': condition_counts[value]}
+        for value, label in Product.CONDITION_CHOICES
+        if condition_counts.get(value)
+    ]
+
+    bucket_counts = base.aggregate(**{
+        'bucket_%d' % i: Count('id', filter=_price_bucket_filter(low, high))
+        for i, (low, high) in enumerate(PRICE_BUCKETS)
+    })
+    price = [
+        {'min': low, 'max': high, 'count': bucket_counts['bucket_%d' % i]}
+        for i, (low, high) in enumerate(PRICE_BUCKETS)
+    ]
+
+    return {'category': categories, 'condition': conditions, 'price': price}
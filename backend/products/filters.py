@@ -0,0 +1,94 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django_filters import rest_framework as django_filters
+from rest_framework import filters
+
+from .models import Product, ProductListing
+
+# Characters with a meaning in MySQL's boolean full-text syntax.
+BOOLEAN_MODE_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Feed filters: exact `category` and `condition`, plus inclusive ranges
+    such as `?price_min=10&price_max=50` or `?year_min=2015`.
+    """
+    price = django_filters.RangeFilter()
+    year = django_filters.RangeFilter(field_name='year_of_manufacture')
+    length = django_filters.RangeFilter()
+    width = django_filters.RangeFilter()
+    height = django_filters.RangeFilter()
+    weight = django_filters.RangeFilter()
+
+    class Meta:
+        model = Product
+        fields = ['category', 'condition', 'price', 'year', 'length', 'width', 'height', 'weight']
+
+
+class ProductListingFilter(ProductFilter):
+    """The same feed filters over the ProductListing read table."""
+
+    class Meta(ProductFilter.Meta):
+        model = ProductListing
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    `?search=` backed by the MySQL FULLTEXT index on `fulltext_fields`.
+
+    Every term is required and prefix-matched (`+term*` in boolean mode), and
+    matching rows are annotated with InnoDB's `relevance` score so they can
+    be ranked. Backends without FULLTEXT support (e.g. SQLite in development)
+    fall back to SearchFilter's LIKE matching on `search_fields`.
+    """
+    fulltext_fields = ('title', 'description')
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        connection = connections[queryset.db]
+        if connection.vendor != 'mysql':
+            return super().filter_queryset(request, queryset, view)
+
+        query = self.to_boolean_query(search_terms)
+        if not query:
+            return queryset.none()
+
+        opts = queryset.model._meta
+        columns = ', '.join(
+            '%s.%s' % (
+                connection.ops.quote_name(opts.db_table),
+                connection.ops.quote_name(opts.get_field(name).column),
+            )
+            for name in self.fulltext_fields
+        )
+        match = 'MATCH (%s) AGAINST (%%s IN BOOLEAN MODE)' % columns
+        return queryset.annotate(
+            relevance=RawSQL(match, (query,), output_field=FloatField())
+        ).filter(RawSQL(match, (query,), output_field=BooleanField()))
+
+    @staticmethod
+    def to_boolean_query(search_terms):
+        words = []
+        for term in search_terms:
+            words.extend(BOOLEAN_MODE_OPERATORS.sub(' ', term).split())
+        return ' '.join('+%s*' % word for word in words)
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that ranks full-text matches best-first unless the client
+    asked for an explicit `?ordering=`.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if (not request.query_params.get(self.ordering_param)
+                and 'relevance' in queryset.query.annotations):
+            return ['-relevance']
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Rendition name -> longest edge in pixels. Originals are never upscaled.
+RENDITIONS = (
+    ('thumbnail', 200),
+    ('card', 480),
+    ('detail', 1200),
+)
+
+# Format key -> (Pillow format, file extension, save options)
+FORMATS = (
+    ('webp', ('WEBP', 'webp', {'quality': 80, 'method': 4})),
+    ('jpeg', ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True})),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                thread_name_prefix='renditions',
+            )
+    return _executor
+
+
+def schedule_renditions(image_id):
+    """Build renditions in the worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _get_executor().submit(_build_in_worker, image_id))
+
+
+def _build_in_worker(image_id):
+    try:
+        build_renditions(image_id)
+    except Exception:
+        logger.exception('Failed to build renditions for ProductImage %s', image_id)
+    finally:
+        close_old_connections()
+
+
+def build_renditions(image_id):
+    """Resize one ProductImage into every rendition and format, then record the paths."""
+    from .models import ProductImage
+
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+    if product_image is None or not product_image.image:
+        return
+
+    source = product_image.image
+    with source.open('rb') as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    stem = os.path.splitext(os.path.basename(source.name))[0]
+    renditions = {'source': source.name}
+    for name, edge in RENDITIONS:
+        frame = original.copy()
+        frame.thumbnail((edge, edge), Image.LANCZOS)
+        entry = {'width': frame.width, 'height': frame.height}
+        for key, (pil_format, extension, options) in FORMATS:
+            output = frame.convert('RGB') if pil_format == 'JPEG' else frame
+            buffer = BytesIO()
+            output.save(buffer, pil_format, **options)
+            path = 'products/renditions/%s/%s_%s.%s' % (product_image.pk, stem, name, extension)
+            if source.storage.exists(path):
+                source.storage.delete(path)
+            entry[key] = source.storage.save(path, ContentFile(buffer.getvalue()))
+        renditions[name] = entry
+
+    product_image.renditions = renditions
+    product_image.save(update_fields=['renditions'])
+
+
+def needs_renditions(product_image):
+    return bool(product_image.image) and product_image.renditions.get('source') != product_image.image.name
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def rendition_url(product_image, name, fmt='jpeg', request=None):
+    """URL of a rendition, falling back to the original until it has been built."""
+    if not product_image.image:
+        return None
+    entry = product_image.renditions.get(name)
+    if entry and product_image.renditions.get('source') == product_image.image.name:
+        url = product_image.image.storage.url(entry[fmt])
+    else:
+        url = product_image.image.url
+    return _absolute(url, request)
+
+
+def rendition_srcset_entries(product_image, fmt='webp'):
+    """`(url, width)` of every built rendition, or None until they are built."""
+    if not product_image.image or product_image.renditions.get('source') != product_image.image.name:
+        return None
+    storage = product_image.image.storage
+    return [
+        (storage.url(entry[fmt]), entry['width'])
+        for entry in (product_image.renditions.get(name) for name, _ in RENDITIONS)
+        if entry
+    ]
+
+
+def format_srcset(entries, request=None):
+    return ', '.join('%s %dw' % (_absolute(url, request), width) for url, width in entries)
+
+
+def rendition_srcset(product_image, fmt='webp', request=None):
+    """`srcset` attribute value listing every built rendition by width."""
+    entries = rendition_srcset_entries(product_image, fmt)
+    if entries is None:
+        return None
+    return format_srcset(entries, request)
@@ -0,0 +1,193 @@
+"""
+Streaming bulk import of product listings from CSV or JSONL.
+
+Rows are read lazily, validated with ProductImportSerializer and inserted
+with bulk_create in fixed-size chunks, one transaction per chunk, so memory
+stays flat however large the file is. Used by the `import_products`
+management command and ProductImportView.
+"""
+
+import csv
+import io
+import json
+import os
+
+from django.core.files import File
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Max
+from rest_framework import serializers
+
+from .cache import bump_versions
+from .counters import products_listed
+from .listings import sync_listings
+from .images import schedule_renditions
+from .models import Category, Product, ProductImage
+from .serializers import ProductImportSerializer
+
+FORMATS = ('csv', 'jsonl')
+
+# Only the first errors are kept in the report; the rest are just counted.
+MAX_REPORTED_ERRORS = 1000
+
+# Attempts at a chunk's explicit primary keys before giving up, on databases
+# whose bulk INSERT does not return them (see ProductImporter.create_products).
+PK_ATTEMPTS = 5
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+def read_rows(stream, fmt):
+    """Yield `(line_number, row_dict)` from a binary stream without reading it whole."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty CSV cells mean "not given", so model defaults apply.
+            cleaned = {key: value for key, value in row.items() if key and value not in ('', None)}
+            if 'images' in cleaned:
+                cleaned['images'] = [name for name in cleaned['images'].split('|') if name]
+            yield reader.line_num, cleaned
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, exc
+                continue
+            yield line_number, row
+    else:
+        raise ValueError(f'Unsupported import format "{fmt}".')
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+class ProductImporter:
+    def __init__(self, seller, chunk_size=500, image_dir=None, progress=None):
+        self.seller = seller
+        self.chunk_size = chunk_size
+        self.image_dir = os.path.realpath(image_dir) if image_dir else None
+        self.progress = progress
+        self.categories = {category.name.lower(): category for category in Category.objects.all()}
+        self.validator = ProductImportSerializer(context={'categories': self.categories})
+
+    def run(self, stream, fmt):
+        report = ImportReport()
+        chunk = []
+        for line, row in read_rows(stream, fmt):
+            report.rows += 1
+            validated = self.validate(line, row, report)
+            if validated is not None:
+                chunk.append(validated)
+            if len(chunk) >= self.chunk_size:
+                self.insert(chunk, report)
+                chunk = []
+        if chunk:
+            self.insert(chunk, report)
+        return report
+
+    def validate(self, line, row, report):
+        if isinstance(row, Exception):
+            report.add_error(line, {'non_field_errors': [f'Invalid JSON: {row}']})
+            return None
+        if not isinstance(row, dict):
+            report.add_error(line, {'non_field_errors': ['Expected an object.']})
+            return None
+        try:
+            data = self.validator.run_validation(row)
+            data['images'] = [self.resolve_image(name) for name in data.get('images', [])]
+        except serializers.ValidationError as exc:
+            report.add_error(line, exc.detail)
+            return None
+        return data
+
+    def resolve_image(self, name):
+        if self.image_dir is None:
+            raise serializers.ValidationError({'images': ['Images are not supported for this import.']})
+        path = os.path.realpath(os.path.join(self.image_dir, name))
+        if os.path.commonpath([path, self.image_dir]) != self.image_dir or not os.path.isfile(path):
+            raise serializers.ValidationError({'images': [f'Image "{name}" not found.']})
+        return path
+
+    def insert(self, rows, report):
+        with transaction.atomic():
+            products = [
+                Product(seller=self.seller, **{key: value for key, value in row.items() if key != 'images'})
+                for row in rows
+            ]
+            self.create_products(products)
+
+            images = []
+            for product, row in zip(products, rows):
+                for i, path in enumerate(row['images']):
+                    with open(path, 'rb') as f:
+                        stored = ProductImage.image.field.storage.save(
+                            'products/' + os.path.basename(path), File(f),
+                        )
+                    images.append(ProductImage(product=product, image=stored, is_primary=(i == 0)))
+            ProductImage.objects.bulk_create(images)
+
+            product_ids = [product.pk for product in products]
+            # bulk_create skips post_save, so do its work here.
+            products_listed((product.category_id, product.seller_id) for product in products if product.is_available)
+            sync_listings(product_ids)
+            transaction.on_commit(lambda: bump_versions('products'))
+            if images:
+                image_ids = ProductImage.objects.filter(product_id__in=product_ids).values_list('id', flat=True)
+                for image_id in image_ids:
+                    schedule_renditions(image_id)
+
+        report.created += len(products)
+        if self.progress:
+            self.progress(report)
+
+    def create_products(self, products):
+        """
+        bulk_create `products` with their primary keys set.
+
+        MySQL's bulk INSERT does not return primary keys, so there they are
+        assigned explicitly above the current maximum, as products.seeding
+        does. A row inserted meanwhile can take one of them; the chunk is
+        then retried with fresh keys.
+        """
+        if connections[Product.objects.db].features.can_return_rows_from_bulk_insert:
+            Product.objects.bulk_create(products)
+            return
+        for attempt in range(PK_ATTEMPTS):
+            base = Product.objects.aggregate(pk=Max('pk'))['pk'] or 0
+            for n, product in enumerate(products):
+                product.pk = base + n + 1
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create(products)
+                return
+            except IntegrityError:
+                if attempt == PK_ATTEMPTS - 1:
+                    raise
@@ -0,0 +1,153 @@
+"""
+Stock movements on Product.quantity.
+
+`quantity` is the number of units still free to sell. Units move out of it
+when a buyer reserves them (cart) or buys them outright, and back in when a
+reservation is released. Every movement is one conditional UPDATE with
+F() expressions, so there is no read-modify-write and the product row is
+locked only for the duration of that statement's transaction.
+
+A listing whose last unit goes is marked `is_sold_out` and unlisted, and
+is listed again when units come back; one its seller delisted is not.
+Product.save() never writes these columns; sellers' edits go through
+update_stock().
+"""
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from .cache import bump_versions
+from .counters import products_listed
+from .listings import set_listing_availability
+from .models import Product
+
+
+def _per_product(quantities):
+    return Case(
+        *[When(id=product_id, then=Value(units)) for product_id, units in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _invalidate(product_ids):
+    transaction.on_commit(lambda: bump_versions(
+        'products', *('product:%s' % product_id for product_id in product_ids)
+    ))
+
+
+def take_stock(quantities):
+    """
+    Remove `{product_id: units}` from stock in a single UPDATE.
+
+    Only listed products with enough units are touched; a product that
+    reaches zero is delisted in the same statement. Returns the ids that
+    could not be satisfied, in which case the caller must roll back its
+    transaction to return the units that were taken (and the counter
+    changes for products that sold out).
+    """
+    quantities = {product_id: units for product_id, units in quantities.items() if units > 0}
+    if not quantities:
+        return set()
+
+    needed = _per_product(quantities)
+    now = timezone.now()
+    # The flags are assigned before `quantity` on purpose: MySQL evaluates
+    # SET clauses left to right, so all must read the pre-update quantity.
+    Product.objects.filter(
+        id__in=quantities, is_available=True, quantity__gte=needed,
+    ).update(
+        is_available=Case(
+            When(quantity=needed, then=Value(False)),
+            default=F('is_available'),
+            output_field=BooleanField(),
+        ),
+        is_sold_out=Case(
+            When(quantity=needed, then=Value(True)),
+            default=F('is_sold_out'),
+            output_field=BooleanField(),
+        ),
+        quantity=F('quantity') - needed,
+        updated_at=now,
+    )
+    _invalidate(quantities)
+
+    # Rows this statement changed carry its timestamp (and stay locked by us).
+    taken = list(
+        Product.objects.filter(id__in=quantities, updated_at=now)
+                       .values_list('id', 'quantity', 'category_id', 'seller_id')
+    )
+    sold_out = [(product_id, category_id, seller_id) for product_id, left, category_id, seller_id in taken if left == 0]
+    products_listed([(category_id, seller_id) for _, category_id, seller_id in sold_out], sign=-1)
+    set_listing_availability([product_id for product_id, _, _ in sold_out], False)
+    return set(quantities) - {product_id for product_id, *_ in taken}
+
+
+def return_stock(quantities):
+    """
+    Put `{product_id: units}` back into stock in a single UPDATE.
+
+    A product that had sold out is listed again; one its seller delisted
+    stays delisted.
+    """
+    quantities = {product_id: units for product_id, units in quantities.items() if units > 0}
+    if not quantities:
+        return
+
+    relisted = list(
+        Product.objects.select_for_update()
+                       .filter(id__in=quantities, is_sold_out=True)
+                       .values_list('id', 'category_id', 'seller_id')
+    )
+    returned = _per_product(quantities)
+    # See take_stock() for why `is_available` comes first.
+    Product.objects.filter(id__in=quantities).update(
+        is_available=Case(
+            When(is_sold_out=True, then=Value(True)),
+            default=F('is_available'),
+            output_field=BooleanField(),
+        ),
+        is_sold_out=Value(False),
+        quantity=F('quantity') + returned,
+        updated_at=timezone.now(),
+    )
+    products_listed([(category_id, seller_id) for _, category_id, seller_id in relisted])
+    set_listing_availability([product_id for product_id, _, _ in relisted], True)
+    _invalidate(quantities)
+
+
+def listing_flags(listed, quantity):
+    """(is_available, is_sold_out) of a product its seller has (un)listed."""
+    return listed and quantity > 0, listed and quantity == 0
+
+
+def update_stock(product, quantity=None, is_available=None):
+    """
+    Apply a seller's edit of `quantity` and/or `is_available` to `product`.
+
+    The quantity moves by the difference from the value the seller loaded,
+    so units sold or reserved meanwhile stay taken (never below zero). The
+    row is locked while the change is applied, and `product` is updated
+    with what was stored.
+    """
+    with transaction.atomic():
+        left, was_available, was_sold_out, category_id = (
+            Product.objects.select_for_update()
+                           .values_list('quantity', 'is_available', 'is_sold_out', 'category_id')
+                           .get(pk=product.pk)
+        )
+        if quantity is not None:
+            left = max(0, left + quantity - product.quantity)
+        listed = was_available or was_sold_out if is_available is None else is_available
+        available, sold_out = listing_flags(listed, left)
+        Product.objects.filter(pk=product.pk).update(
+            quantity=left, is_available=available, is_sold_out=sold_out, updated_at=timezone.now(),
+        )
+        if available != was_available:
+            products_listed([(category_id, product.seller_id)], sign=1 if available else -1)
+            set_listing_availability([product.pk], available)
+        _invalidate([product.pk])
+    product.quantity, product.is_available, product.is_sold_out = left, available, sold_out
+    # What products.signals diffs the next save's listing counters against;
+    # a category change not saved yet is counted by that save.
+    product._listing_state = (available, category_id)
@@ -0,0 +1,127 @@
+"""
+Sync of the ProductListing read table.
+
+`sync_listings(ids)` recomputes the rows of the given products from the
+source tables (a select_related query plus the primary-image prefetch) and
+upserts them in one statement; products that no longer exist lose their
+row. Signals call it for ORM saves, and bulk code paths call it directly.
+Renames of categories and sellers are copied with a single UPDATE.
+"""
+
+from django.db import connection, transaction
+
+from .images import rendition_srcset_entries, rendition_url
+from .models import Product, ProductListing, primary_image_prefetch
+
+SYNCED_FIELDS = [
+    'title', 'price', 'category', 'category_name', 'condition', 'seller', 'seller_name',
+    'is_available', 'primary_image', 'primary_image_srcset', 'created_at',
+    'year_of_manufacture', 'length', 'width', 'height', 'weight',
+]
+
+
+def listing_for(product):
+    """ProductListing row for a product loaded with Product.objects.for_listing()."""
+    # The image ProductListSerializer picks: the first primary one, if it has a file
+    image = product.primary_images[0] if product.primary_images else None
+    if image is not None and not image.image:
+        image = None
+    return ProductListing(
+        id=product.pk,
+        title=product.title,
+        price=product.price,
+        category_id=product.category_id,
+        category_name=product.category.name,
+        condition=product.condition,
+        seller_id=product.seller_id,
+        seller_name=product.seller.username,
+        is_available=product.is_available,
+        # Same image the list serializer picks: the card-sized JPEG
+        primary_image=rendition_url(image, 'card', 'jpeg') if image else '',
+        primary_image_srcset=rendition_srcset_entries(image) if image else None,
+        created_at=product.created_at,
+        year_of_manufacture=product.year_of_manufacture,
+        length=product.length,
+        width=product.width,
+        height=product.height,
+        weight=product.weight,
+    )
+
+
+def upsert_listings(listings):
+    if not listings:
+        return
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target.
+    unique_fields = ['id'] if connection.features.supports_update_conflicts_with_target else None
+    ProductListing.objects.bulk_create(
+        listings, update_conflicts=True, unique_fields=unique_fields, update_fields=SYNCED_FIELDS,
+    )
+
+
+def sync_listings(product_ids):
+    """Bring the listing rows of `product_ids` in line with the products."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    # Lock the products so a concurrent writer's sync cannot be overwritten
+    # by one that read the rows before that writer committed.
+    lock_of = ('self',) if connection.features.has_select_for_update_of else ()
+    with transaction.atomic():
+        products = list(
+            Product.objects.filter(pk__in=product_ids)
+                           .select_for_update(of=lock_of)
+                           .select_related('category', 'seller')
+                           .prefetch_related(primary_image_prefetch())
+                           .order_by()
+        )
+        upsert_listings([listing_for(product) for product in products])
+        missing = product_ids - {product.pk for product in products}
+        if missing:
+            ProductListing.objects.filter(pk__in=missing).delete()
+
+
+def set_listing_availability(product_ids, is_available):
+    """Copy an is_available change made with QuerySet.update()."""
+    if product_ids:
+        ProductListing.objects.filter(pk__in=product_ids).update(is_available=is_available)
+
+
+def rename_category(category):
+    ProductListing.objects.filter(category=category).exclude(category_name=category.name).update(category_name=category.name)
+
+
+def rename_seller(user):
+    ProductListing.objects.filter(seller=user).exclude(seller_name=user.username).update(seller_name=user.username)
+
+
+def rebuild_listings(batch_size=1000, progress=None):
+    """
+    Recompute every listing row, `batch_size` products at a time in primary
+    key order, then drop rows whose product is gone. Returns the number of
+    products synced.
+    """
+    synced = 0
+    last_pk = 0
+    while True:
+        ids = list(
+            Product.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        sync_listings(ids)
+        synced += len(ids)
+        last_pk = ids[-1]
+        if progress:
+            progress(synced)
+
+    last_pk = 0
+    while True:
+        ids = list(
+            ProductListing.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        existing = set(Product.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        ProductListing.objects.filter(pk__in=set(ids) - existing).delete()
+        last_pk = ids[-1]
+    return synced
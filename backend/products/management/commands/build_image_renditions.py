@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from products.images import build_renditions, needs_renditions
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Build resized WebP/JPEG renditions for product images that are missing or stale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild renditions for every image.')
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'renditions')
+        built = 0
+        for product_image in images.iterator(chunk_size=500):
+            if options['all'] or needs_renditions(product_image):
+                try:
+                    build_renditions(product_image.pk)
+                except (OSError, ValueError) as exc:
+                    self.stderr.write(f'Image {product_image.pk}: {exc}')
+                    continue
+                built += 1
+        self.stdout.write(self.style.SUCCESS(f'Built renditions for {built} images'))
@@ -0,0 +1,50 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import FORMATS, ProductImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Stream product listings for one seller from a CSV or JSONL file into the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument('--seller', required=True, help='Email or username of the seller')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--images-dir', help='Directory that image file names are resolved against')
+        parser.add_argument('--errors', help='Write the per-row errors to this JSON file')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            seller = User.objects.get_by_login(options['seller'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user matches "{options["seller"]}".')
+
+        fmt = options['format'] or detect_format(options['path'])
+        if fmt is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+
+        def progress(report):
+            self.stdout.write(f'{report.rows} rows read, {report.created} created, {report.failed} failed')
+
+        importer = ProductImporter(
+            seller,
+            chunk_size=options['chunk_size'],
+            image_dir=options['images_dir'],
+            progress=progress,
+        )
+        with open(options['path'], 'rb') as stream:
+            report = importer.run(stream, fmt)
+
+        if options['errors']:
+            with open(options['errors'], 'w') as f:
+                json.dump(report.errors, f, indent=2, default=str)
+        for error in report.errors[:20]:
+            self.stderr.write(f'line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} of {report.rows} rows ({report.failed} failed)'
+        ))
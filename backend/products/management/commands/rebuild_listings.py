@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from products.listings import rebuild_listings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the ProductListing read table from products, images, categories and sellers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Products synced per statement')
+
+    def handle(self, *args, **options):
+        synced = rebuild_listings(
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stderr.write(f'{count} products synced'),
+        )
+        self.stdout.write(f'Rebuilt {synced} listings.')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products.similar import build_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the similar products index from every available listing and make it current. '
+        'Run it periodically (e.g. nightly from cron); processes pick up the new build on their next refresh.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Products read per database round trip')
+        parser.add_argument('--directory', help='Defaults to SIMILAR_PRODUCTS_INDEX_DIR')
+
+    def handle(self, *args, **options):
+        count = build_index(
+            directory=options['directory'],
+            batch_size=options['batch_size'],
+            progress=lambda count: self.stderr.write(f'{count} products indexed'),
+        )
+        self.stdout.write(f'Indexed {count} products.')
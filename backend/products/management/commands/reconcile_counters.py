@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the listing counters on categories and sellers and fix any that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows locked and checked per transaction')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters(batch_size=options['batch_size'])
+        self.stdout.write(f'Fixed {fixed["categories"]} categories and {fixed["users"]} users.')
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.seeding import SEED_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert deterministic users, listings, images, carts and orders for load testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--max-images', type=int, default=3, help='Images per listing are 0..N')
+        parser.add_argument('--cart-ratio', type=float, default=0.1, help='Share of users with a cart')
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--seller-ratio', type=int, default=20, help='One user in N is a seller')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help='Usernames are <prefix>-user-<n>')
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            seed=options['seed'],
+            users=options['users'],
+            products=options['products'],
+            max_images=options['max_images'],
+            cart_ratio=options['cart_ratio'],
+            orders=options['orders'],
+            seller_ratio=options['seller_ratio'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            progress=self.stdout.write,
+        )
+        try:
+            seeder.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded users {options["prefix"]}-user-0..{options["users"] - 1} (password "{SEED_PASSWORD}").'
+        ))
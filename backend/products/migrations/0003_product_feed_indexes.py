@@ -0,0 +1,25 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_brand_product_color_product_height_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_available', 'created_at', 'id'], name='product_feed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_available', 'price', 'id'], name='product_feed_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['seller', 'created_at', 'id'], name='product_seller_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE products_product '
+        'ADD FULLTEXT INDEX product_fulltext_idx (title, description)'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute('ALTER TABLE products_product DROP INDEX product_fulltext_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productimage_renditions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_available', 'category', 'created_at', 'id'], name='product_feed_category_idx'),
+        ),
+    ]
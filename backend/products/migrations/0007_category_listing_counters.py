@@ -0,0 +1,51 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:57
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_counters(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Product = apps.get_model('products', 'Product')
+    OrderItem = apps.get_model('cart', 'OrderItem')
+    targets = (
+        (apps.get_model('products', 'Category'), 'category'),
+        (apps.get_model('accounts', 'User'), 'seller'),
+    )
+    for model, key in targets:
+        rows = model.objects.using(alias)
+        available = (
+            Product.objects.using(alias).filter(is_available=True)
+            .order_by().values_list(key).annotate(n=Count('pk'))
+        )
+        for pk, count in available:
+            rows.filter(pk=pk).update(available_products_count=count)
+        sold = (
+            OrderItem.objects.using(alias).exclude(product=None)
+            .order_by().values_list('product__' + key).annotate(n=Sum('quantity'))
+        )
+        for pk, count in sold:
+            rows.filter(pk=pk).update(sold_products_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_feed_category_index'),
+        ('accounts', '0003_user_listing_counters'),
+        ('cart', '0005_orderitem_product_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='available_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='sold_products_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
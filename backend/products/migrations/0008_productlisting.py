@@ -0,0 +1,41 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0007_category_listing_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('category_name', models.CharField(max_length=100)),
+                ('condition', models.CharField(choices=[('new', 'New'), ('like-new', 'Like New'), ('good', 'Good'), ('fair', 'Fair'), ('poor', 'Poor')], max_length=20)),
+                ('seller_name', models.CharField(max_length=150)),
+                ('is_available', models.BooleanField()),
+                ('primary_image', models.CharField(blank=True, max_length=255)),
+                ('primary_image_srcset', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('year_of_manufacture', models.PositiveIntegerField(blank=True, null=True)),
+                ('length', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('width', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('height', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('weight', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.category')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_available', 'created_at', 'id'], name='listing_feed_created_idx'), models.Index(fields=['is_available', 'category', 'created_at', 'id'], name='listing_feed_category_idx'), models.Index(fields=['is_available', 'price', 'id'], name='listing_feed_price_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+def backfill_sold_out(apps, schema_editor):
+    # Until now every unlisted product without units was relisted when units
+    # came back; keep that for the existing ones.
+    Product = apps.get_model('products', 'Product')
+    Product.objects.using(schema_editor.connection.alias).filter(
+        quantity=0, is_available=False,
+    ).update(is_sold_out=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_sold_out',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_sold_out, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Prefetch
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -6,6 +7,9 @@ User = get_user_model()
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    # Maintained with F() updates by products.counters
+    available_products_count = models.IntegerField(default=0, editable=False)
+    sold_products_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -14,6 +18,32 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Never write back counters read earlier; they only move through F().
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('available_products_count', 'sold_products_count')
+            ]
+        super().save(*args, **kwargs)
+
+def primary_image_prefetch(lookup='images'):
+    """Prefetch only the primary images onto `product.primary_images`, oldest first."""
+    return Prefetch(
+        lookup,
+        queryset=ProductImage.objects.filter(is_primary=True).order_by('pk'),
+        to_attr='primary_images',
+    )
+
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Everything ProductListSerializer reads, in a constant number of queries."""
+        return self.select_related('seller', 'category').prefetch_related(primary_image_prefetch())
+
+    def for_detail(self):
+        """Everything ProductSerializer reads, in a constant number of queries."""
+        return self.select_related('seller', 'category').prefetch_related('images')
+
 class Product(models.Model):
     CONDITION_CHOICES = [
         ('new', 'New'),
@@ -52,20 +82,87 @@ class Product(models.Model):
     # System fields
     seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='products')
     is_available = models.BooleanField(default=True)
+    # Listed, but every unit is sold or reserved; such a listing comes back
+    # when units are returned. Seller delisting clears it.
+    is_sold_out = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
+    # Only ever moved by products.inventory, with conditional UPDATEs
+    STOCK_FIELDS = ('quantity', 'is_available', 'is_sold_out')
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the feed: (filter, sort key, id tiebreaker)
+            models.Index(fields=['is_available', 'created_at', 'id'], name='product_feed_created_idx'),
+            models.Index(fields=['is_available', 'category', 'created_at', 'id'], name='product_feed_category_idx'),
+            models.Index(fields=['is_available', 'price', 'id'], name='product_feed_price_idx'),
+            models.Index(fields=['seller', 'created_at', 'id'], name='product_seller_created_idx'),
+            # Changed-since scans of the similar products index
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Never write back stock read earlier: a concurrent sale or
+        # reservation would be undone.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STOCK_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/', blank=True, null=True)
     alt_text = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
+    # Resized WebP/JPEG derivatives built by products.images; empty until ready.
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    def __str__(self):
+        return f"{self.product.title} - Image"
+
+
+class ProductListing(models.Model):
+    """
+    Denormalized feed row: everything ProductListSerializer shows, plus the
+    columns the feed filters on, so a page is one index scan of this table.
+    Maintained by products.listings; `id` is the product's id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    category_name = models.CharField(max_length=100)
+    condition = models.CharField(max_length=20, choices=Product.CONDITION_CHOICES)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    seller_name = models.CharField(max_length=150)
+    is_available = models.BooleanField()
+    # Relative URLs; made absolute per request
+    primary_image = models.CharField(max_length=255, blank=True)
+    primary_image_srcset = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField()
+
+    # Filter-only columns
+    year_of_manufacture = models.PositiveIntegerField(null=True, blank=True)
+    length = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    width = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    height = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    weight = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_available', 'created_at', 'id'], name='listing_feed_created_idx'),
+            models.Index(fields=['is_available', 'category', 'created_at', 'id'], name='listing_feed_category_idx'),
+            models.Index(fields=['is_available', 'price', 'id'], name='listing_feed_price_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.product.title} - Image"
\ No newline at end of file
+        return self.title
@@ -0,0 +1,156 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination over the full sort key.
+
+    DRF's CursorPagination only seeks on the first ordering field and falls
+    back to OFFSET for ties, which degrades on non-unique keys such as price.
+    Here the cursor carries the value of every ordering field, and `id` is
+    always appended as a tiebreaker, so each page is a single index range
+    scan of `page_size + 1` rows regardless of how deep the client has paged.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            # Follow the direction of the leading key so one composite index
+            # can serve the whole ordering.
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request, queryset)
+        reverse, position = self.cursor or (False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+
+        # Fetch one extra row to find out whether another page follows.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # An empty backwards page means nothing precedes the cursor.
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor((False, position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Paged past the end; step back onto the last page.
+            return self.encode_cursor((True, None))
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor((True, position))
+
+    def decode_cursor(self, request, queryset=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            position = tokens.get('p')
+            if position is not None:
+                if len(position) != len(self.ordering):
+                    raise ValueError('Cursor does not match the requested ordering.')
+                position = tuple(
+                    self._to_python(queryset, field, value)
+                    for field, value in zip(self.ordering, position)
+                )
+        except (TypeError, ValueError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, position
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        tokens = {}
+        if reverse:
+            tokens['r'] = '1'
+        if position is not None:
+            tokens['p'] = position
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            name = field.lstrip('-')
+            attr = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(str(attr))
+        return position
+
+    @staticmethod
+    def _to_python(queryset, field, value):
+        name = field.lstrip('-')
+        if queryset is None:
+            return value
+        if name in queryset.query.annotations:
+            # Sorting on a computed column, e.g. search relevance.
+            return queryset.query.annotations[name].output_field.to_python(value)
+        return queryset.model._meta.get_field(name).to_python(value)
+
+    @staticmethod
+    def _seek_filter(ordering, position):
+        """
+        Build `(a, b, id) > (x, y, z)` as an OR of prefix-equality terms,
+        honouring the direction of each ordering field.
+        """
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            term = Q(**{name + lookup: position[i]})
+            for prev_field, prev_value in zip(ordering[:i], position[:i]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+
+class ProductPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,221 @@
+"""
+Row serializers for the hot list endpoints.
+
+`ProductListRows`, `ProductListingRows` and `CartItemRows` return exactly
+what ProductListSerializer (or CartItemSerializer) returns, but read the
+page as `.values()` dicts instead of model instances, and convert each
+column with a function set up once per page instead of a DRF field per
+value. A view opts in by paginating `rows(queryset)` and serializing the
+page with `get_serializer(page, many=True)` as usual.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import classproperty
+from django.utils.encoding import iri_to_uri
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from ecofinds.metrics import TimedSerializerMixin
+from .images import format_srcset, rendition_srcset_entries, rendition_url
+from .models import Product, ProductImage
+
+# ProductListSerializer's fields, in output order
+LIST_FIELDS = (
+    'id', 'title', 'price', 'category_name', 'condition', 'seller_name', 'is_available',
+    'primary_image', 'primary_image_srcset', 'created_at',
+)
+IMAGE_FIELDS = ('primary_image', 'primary_image_srcset')
+
+
+def decimal_string(field):
+    """DecimalField.to_representation for a model DecimalField's values."""
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+    return lambda value: '{:f}'.format(value.quantize(exponent))
+
+
+def datetime_string():
+    """DateTimeField.to_representation in the current time zone."""
+    if api_settings.DATETIME_FORMAT is None or api_settings.DATETIME_FORMAT.lower() != ISO_8601:
+        return serializers.DateTimeField().to_representation
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def convert(value):
+        if tz is not None:
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+class AbsoluteURLs:
+    """`request.build_absolute_uri()` for storage URLs, resolving the host once."""
+
+    def __init__(self, request):
+        self.request = request
+        self.prefix = request.build_absolute_uri('/')[:-1]
+
+    def build_absolute_uri(self, location):
+        if location.startswith('/') and not location.startswith('//') and '/./' not in location and '/../' not in location:
+            return iri_to_uri(self.prefix + location)
+        return self.request.build_absolute_uri(location)
+
+
+def primary_images(product_ids):
+    """
+    `{product_id: (card URL, srcset entries)}` for the image
+    ProductListSerializer shows, loaded like primary_image_prefetch().
+    """
+    first = {}
+    for product_id, name, renditions in (
+        ProductImage.objects.filter(product_id__in=product_ids, is_primary=True)
+                            .order_by('pk')
+                            .values_list('product_id', 'image', 'renditions')
+    ):
+        first.setdefault(product_id, (name, renditions))
+    images = {}
+    for product_id, (name, renditions) in first.items():
+        if name:
+            image = ProductImage(image=name, renditions=renditions)
+            images[product_id] = (rendition_url(image, 'card', 'jpeg'), rendition_srcset_entries(image))
+    return images
+
+
+class RowSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only serializer of a whole page of `.values()` rows. `columns`
+    maps each output field, in order, to the columns it is built from;
+    `key_columns` are read whatever `context['fields']` selects.
+    """
+    columns = {}
+    key_columns = ('id',)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # Serializes the list itself; there is no per-row child.
+        return cls(*args, **kwargs)
+
+    @classproperty
+    def field_names(cls):
+        return tuple(cls.columns)
+
+    @classmethod
+    def rows(cls, queryset, fields=None):
+        """`queryset` as rows of the columns `fields` (default: all) need."""
+        needed = dict.fromkeys(cls.key_columns)
+        for name in cls.columns if fields is None else fields:
+            needed.update(dict.fromkeys(cls.columns[name]))
+        # Keep annotations (e.g. search relevance) the paginator may sort on.
+        return (
+            queryset.select_related(None).prefetch_related(None)
+                    .values(*needed, *queryset.query.annotations)
+        )
+
+
+class ProductRow:
+    """
+    Converts a row into a ProductListSerializer dict of `fields` (default:
+    all). `keys` maps each field except the image ones to its row key.
+    """
+
+    def __init__(self, request, keys, fields=None):
+        urls = AbsoluteURLs(request)
+        price = decimal_string(Product._meta.get_field('price'))
+        stamp = datetime_string()
+
+        def column(name):
+            key = keys[name]
+            return lambda row, image: row[key]
+
+        converters = {
+            'id': column('id'),
+            'title': column('title'),
+            'price': lambda row, image, key=keys['price']: price(row[key]),
+            'category_name': column('category_name'),
+            'condition': column('condition'),
+            'seller_name': column('seller_name'),
+            'is_available': column('is_available'),
+            'primary_image': lambda row, image: urls.build_absolute_uri(image[0]) if image else None,
+            'primary_image_srcset': lambda row, image: (
+                format_srcset(image[1], urls) if image and image[1] is not None else None
+            ),
+            'created_at': lambda row, image, key=keys['created_at']: stamp(row[key]),
+        }
+        self.datetime = stamp
+        self.converters = [(name, converters[name]) for name in (converters if fields is None else fields)]
+        self.shows_image = any(name in IMAGE_FIELDS for name, _ in self.converters)
+
+    def __call__(self, row, image):
+        return {name: convert(row, image) for name, convert in self.converters}
+
+# Output field -> Product column, for the fields read straight from a column
+PRODUCT_KEYS = {
+    'id': 'id', 'title': 'title', 'price': 'price', 'category_name': 'category__name',
+    'condition': 'condition', 'seller_name': 'seller__username', 'is_available': 'is_available',
+    'created_at': 'created_at',
+}
+
+
+class ProductListRows(RowSerializer):
+    """ProductListSerializer output from Product rows."""
+    columns = {
+        name: (PRODUCT_KEYS[name],) if name in PRODUCT_KEYS else ()
+        for name in LIST_FIELDS
+    }
+    # The sort keys the feed paginates on
+    key_columns = ('id', 'price', 'created_at')
+
+    def to_representation(self, rows):
+        convert = ProductRow(self.context['request'], PRODUCT_KEYS, self.context.get('fields'))
+        images = primary_images([row['id'] for row in rows]) if convert.shows_image else {}
+        return [convert(row, images.get(row['id'])) for row in rows]
+
+
+class ProductListingRows(RowSerializer):
+    """ProductListSerializer output from ProductListing rows."""
+    columns = {
+        name: ('primary_image', 'primary_image_srcset') if name in IMAGE_FIELDS else (name,)
+        for name in LIST_FIELDS
+    }
+    key_columns = ('id', 'price', 'created_at')
+
+    def to_representation(self, rows):
+        keys = {name: name for name in PRODUCT_KEYS}
+        convert = ProductRow(self.context['request'], keys, self.context.get('fields'))
+        return [
+            convert(row, (row['primary_image'], row['primary_image_srcset']) if row.get('primary_image') else None)
+            for row in rows
+        ]
+
+
+class CartItemRows(RowSerializer):
+    """CartItemSerializer output from CartItem rows."""
+    columns = {
+        'id': ('id',),
+        'product': tuple('product__' + column for column in PRODUCT_KEYS.values()),
+        'quantity': ('quantity',),
+        'total_price': ('product__price', 'quantity'),
+        'reserved_until': ('reserved_until',),
+        'added_at': ('added_at',),
+    }
+    key_columns = ('id', 'added_at')
+
+    def to_representation(self, rows):
+        keys = {name: 'product__' + column for name, column in PRODUCT_KEYS.items()}
+        product = ProductRow(self.context['request'], keys)
+        datetime = product.datetime
+        images = primary_images({row['product__id'] for row in rows})
+        return [
+            {
+                'id': row['id'],
+                'product': product(row, images.get(row['product__id'])),
+                'quantity': row['quantity'],
+                # CartItem.total_price; rendered as a number, like ReadOnlyField
+                'total_price': row['product__price'] * row['quantity'],
+                'reserved_until': datetime(row['reserved_until']) if row['reserved_until'] is not None else None,
+                'added_at': datetime(row['added_at']),
+            }
+            for row in rows
+        ]
@@ -0,0 +1,286 @@
+"""
+Deterministic bulk data for load tests.
+
+Every row is derived from `(seed, kind, n)` alone, so the same arguments
+always produce the same users, listings, images, carts and orders, and an
+order line can recompute the listing it snapshots without reading it back.
+Primary keys are assigned explicitly above the current maximum, which also
+sidesteps MySQL's bulk_create not returning them. Timestamps are the insert
+time (auto_now_add cannot be overridden through bulk_create).
+"""
+
+import random
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from PIL import Image
+
+from cart.models import CartItem, Order, OrderItem
+from .cache import bump_versions
+from .counters import CounterDeltas
+from .listings import sync_listings
+from .models import Category, Product, ProductImage
+
+SEED_PASSWORD = 'seed-password-1'
+
+# name, description, share of listings, median price, item nouns, brands
+CATEGORIES = (
+    ('Electronics', 'Phones, laptops, gadgets', 24, 180,
+     ('Smartphone', 'Laptop', 'Tablet', 'Headphones', 'Smartwatch', 'Camera', 'Speaker', 'Monitor'),
+     ('Apple', 'Samsung', 'Sony', 'Dell', 'Lenovo', 'Bose', 'Canon', 'LG')),
+    ('Clothing', 'Fashion and apparel', 20, 25,
+     ('Jacket', 'Jeans', 'Sweater', 'Dress', 'Sneakers', 'Boots', 'Shirt', 'Coat'),
+     ("Levi's", 'Nike', 'Adidas', 'Zara', 'H&M', 'Patagonia', 'Uniqlo')),
+    ('Books', 'Books and educational materials', 16, 8,
+     ('Novel', 'Textbook', 'Cookbook', 'Biography', 'Comic', 'Atlas', 'Dictionary'),
+     ('Penguin', 'HarperCollins', 'Oxford', 'Vintage', "O'Reilly")),
+    ('Home & Garden', 'Furniture and home decor', 18, 60,
+     ('Armchair', 'Table', 'Lamp', 'Rug', 'Bookshelf', 'Mirror', 'Planter', 'Kettle'),
+     ('IKEA', 'West Elm', 'Habitat', 'Dyson', 'Philips', 'Bosch')),
+    ('Sports & Outdoors', 'Sports equipment and outdoor gear', 12, 45,
+     ('Bicycle', 'Tent', 'Backpack', 'Racket', 'Skateboard', 'Yoga Mat', 'Dumbbells'),
+     ('Decathlon', 'Trek', 'The North Face', 'Wilson', 'Coleman')),
+    ('Toys & Games', 'Children toys and board games', 10, 15,
+     ('Board Game', 'Puzzle', 'Lego Set', 'Doll', 'Train Set', 'Action Figure'),
+     ('Lego', 'Hasbro', 'Mattel', 'Ravensburger', 'Fisher-Price')),
+)
+
+CONDITION_WEIGHTS = (('new', 8), ('like-new', 22), ('good', 40), ('fair', 22), ('poor', 8))
+CONDITION_PRICE_FACTOR = {'new': 1.0, 'like-new': 0.8, 'good': 0.6, 'fair': 0.4, 'poor': 0.25}
+ADJECTIVES = ('Vintage', 'Classic', 'Compact', 'Large', 'Lightweight', 'Refurbished', 'Handmade', 'Retro', 'Modern', 'Portable')
+COLORS = ('Black', 'White', 'Grey', 'Blue', 'Red', 'Green', 'Brown', 'Beige', 'Silver', 'Pink')
+MATERIALS = ('Plastic', 'Wood', 'Metal', 'Cotton', 'Leather', 'Glass', 'Wool', 'Aluminium', 'Paper')
+SENTENCES = (
+    'Used for {years} years and looked after carefully.',
+    'Comes from a smoke-free, pet-free home.',
+    'Selling because I am moving and cannot take it with me.',
+    'Minor signs of wear, see photos for details.',
+    'Works perfectly, tested before listing.',
+    'Pick-up preferred but happy to post at cost.',
+    'Original receipt available on request.',
+    'A great {adjective} {noun} at a fraction of the retail price.',
+    'Some scratches on the {material} surface that do not affect use.',
+    'Bought new in {year}, barely used since.',
+)
+ORDER_STATUS_WEIGHTS = (('pending', 10), ('confirmed', 15), ('shipped', 15), ('delivered', 55), ('cancelled', 5))
+PLACEHOLDER_IMAGES = 8
+
+
+def _rng(seed, kind, n):
+    return random.Random('%s:%s:%s' % (seed, kind, n))
+
+
+def _weighted(rng, weighted):
+    return rng.choices([value for value, _ in weighted], weights=[weight for _, weight in weighted])[0]
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+class Seeder:
+    """
+    Insert `users` accounts (one in `seller_ratio` lists items), `products`
+    listings with up to `max_images` images, carts for `cart_ratio` of the
+    users and `orders` orders, `batch_size` rows per INSERT.
+    """
+
+    def __init__(self, seed=0, users=1000, products=10000, max_images=3, cart_ratio=0.1,
+                 orders=2000, seller_ratio=20, batch_size=5000, prefix='seed', progress=None):
+        self.seed = seed
+        self.users = users
+        self.products = products
+        self.max_images = max_images
+        self.cart_ratio = cart_ratio
+        self.orders = orders
+        self.sellers = max(1, users // seller_ratio)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.progress = progress or (lambda message: None)
+
+    def run(self):
+        User = get_user_model()
+        if User.objects.filter(username_lower__startswith='%s-user-' % self.prefix).exists():
+            raise ValueError('Users prefixed "%s-user-" already exist; pick another prefix.' % self.prefix)
+        self.user_base = self._base(User)
+        self.product_base = self._base(Product)
+        self.categories = self._categories()
+        self.placeholders = self._placeholders()
+
+        self.seed_users(User)
+        self.seed_products()
+        self.seed_carts()
+        self.seed_orders()
+        # bulk_create skips the signals that invalidate cached listings.
+        bump_versions('products', 'categories')
+
+    @staticmethod
+    def _base(model):
+        return model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+    def _categories(self):
+        categories = []
+        for name, description, *_ in CATEGORIES:
+            category, _ = Category.objects.get_or_create(name=name, defaults={'description': description})
+            categories.append(category.pk)
+        return categories
+
+    def _placeholders(self):
+        names = []
+        for i in range(PLACEHOLDER_IMAGES):
+            name = 'products/seed/placeholder-%d.jpg' % i
+            if not default_storage.exists(name):
+                buffer = BytesIO()
+                Image.new('RGB', (800, 600), (40 + i * 25, 160 - i * 10, 90 + i * 15)).save(buffer, 'JPEG')
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            names.append(name)
+        return names
+
+    def user_pk(self, n):
+        return self.user_base + n + 1
+
+    def product_pk(self, n):
+        return self.product_base + n + 1
+
+    def product_fields(self, n):
+        """Every column of listing `n`, plus how many images it has."""
+        rng = _rng(self.seed, 'product', n)
+        index = rng.choices(range(len(CATEGORIES)), weights=[row[2] for row in CATEGORIES])[0]
+        _, _, _, median_price, nouns, brands = CATEGORIES[index]
+        noun, brand, adjective = rng.choice(nouns), rng.choice(brands), rng.choice(ADJECTIVES)
+        condition = _weighted(rng, CONDITION_WEIGHTS)
+        material, color = rng.choice(MATERIALS), rng.choice(COLORS)
+        year = rng.randint(1995, 2025)
+        price = median_price * rng.lognormvariate(0, 0.6) * CONDITION_PRICE_FACTOR[condition]
+        sentences = rng.sample(SENTENCES, rng.randint(1, 6))
+        description = ' '.join(sentences).format(
+            years=rng.randint(1, 10), adjective=adjective.lower(), noun=noun.lower(),
+            material=material.lower(), year=year,
+        )
+        # Skewed towards the first sellers: a few list far more than most.
+        seller = int(self.sellers * rng.random() ** 2)
+        return {
+            'title': ' '.join(filter(None, (adjective, brand, noun, rng.choice(('', 'Pro', 'Mini', 'XL', str(year)))))),
+            'description': description,
+            'price': Decimal('%.2f' % max(price, 1)),
+            'quantity': _weighted(rng, ((1, 70), (2, 15), (3, 8), (5, 5), (10, 2))),
+            'category_id': self.categories[index],
+            'condition': condition,
+            'brand': brand,
+            'model': '%s-%d' % (noun[:3].upper(), rng.randint(100, 999)),
+            'year_of_manufacture': year if rng.random() < 0.7 else None,
+            'material': material,
+            'color': color,
+            'length': Decimal('%.2f' % rng.uniform(5, 200)),
+            'width': Decimal('%.2f' % rng.uniform(5, 150)),
+            'height': Decimal('%.2f' % rng.uniform(1, 120)),
+            'weight': Decimal('%.2f' % rng.uniform(0.1, 40)),
+            'original_packaging': rng.random() < 0.3,
+            'manual_included': rng.random() < 0.25,
+            'working_condition_description': 'Fully working.' if rng.random() < 0.5 else '',
+            'seller_id': self.user_pk(seller),
+            'is_available': rng.random() < 0.9,
+            'image_count': rng.randint(0, self.max_images) if self.max_images else 0,
+        }
+
+    def seed_users(self, User):
+        # One shared hash: hashing per user would dominate the run.
+        password = make_password(SEED_PASSWORD)
+        for chunk in _chunks(self.users, self.batch_size):
+            User.objects.bulk_create([
+                User(
+                    pk=self.user_pk(n),
+                    username='%s-user-%d' % (self.prefix, n),
+                    username_lower='%s-user-%d' % (self.prefix, n),
+                    email='%s-user-%d@example.com' % (self.prefix, n),
+                    email_lower='%s-user-%d@example.com' % (self.prefix, n),
+                    password=password,
+                )
+                for n in chunk
+            ])
+            self.progress('users: %d/%d' % (chunk.stop, self.users))
+
+    def seed_products(self):
+        for chunk in _chunks(self.products, self.batch_size):
+            products, images, listings = [], [], CounterDeltas()
+            for n in chunk:
+                fields = self.product_fields(n)
+                image_count = fields.pop('image_count')
+                if fields['is_available']:
+                    listings.listed(fields['category_id'], fields['seller_id'])
+                products.append(Product(pk=self.product_pk(n), **fields))
+                images.extend(
+                    ProductImage(
+                        product_id=self.product_pk(n),
+                        image=self.placeholders[(n + i) % len(self.placeholders)],
+                        is_primary=(i == 0),
+                    )
+                    for i in range(image_count)
+                )
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+                ProductImage.objects.bulk_create(images, batch_size=self.batch_size)
+                listings.apply()
+                sync_listings(product.pk for product in products)
+            self.progress('products: %d/%d' % (chunk.stop, self.products))
+
+    def seed_carts(self):
+        if not self.products:
+            return
+        for chunk in _chunks(self.users, self.batch_size):
+            items = []
+            for n in chunk:
+                rng = _rng(self.seed, 'cart', n)
+                if rng.random() >= self.cart_ratio:
+                    continue
+                items.extend(
+                    CartItem(user_id=self.user_pk(n), product_id=self.product_pk(p), quantity=1)
+                    for p in rng.sample(range(self.products), min(rng.randint(1, 4), self.products))
+                )
+            CartItem.objects.bulk_create(items)
+        self.progress('carts: done')
+
+    def seed_orders(self):
+        if not self.products or not self.users:
+            return
+        order_base = self._base(Order)
+        for chunk in _chunks(self.orders, self.batch_size):
+            orders, lines, sales = [], [], CounterDeltas()
+            for n in chunk:
+                rng = _rng(self.seed, 'order', n)
+                order_pk = order_base + n + 1
+                total = Decimal('0')
+                for p in rng.sample(range(self.products), min(_weighted(rng, ((1, 60), (2, 25), (3, 15))), self.products)):
+                    product = self.product_fields(p)
+                    quantity = 1 if product['quantity'] == 1 else rng.randint(1, 2)
+                    total += product['price'] * quantity
+                    sales.sold(product['category_id'], product['seller_id'], quantity)
+                    lines.append(OrderItem(
+                        order_id=order_pk,
+                        product_id=self.product_pk(p),
+                        category_id=product['category_id'],
+                        seller_id=product['seller_id'],
+                        quantity=quantity,
+                        price=product['price'],
+                        product_title=product['title'],
+                        product_category=CATEGORIES[self.categories.index(product['category_id'])][0],
+                        product_image=self.placeholders[p % len(self.placeholders)] if product['image_count'] else '',
+                    ))
+                orders.append(Order(
+                    pk=order_pk,
+                    user_id=self.user_pk(rng.randrange(self.users)),
+                    total_amount=total,
+                    status=_weighted(rng, ORDER_STATUS_WEIGHTS),
+                ))
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(lines, batch_size=self.batch_size)
+                sales.apply()
+            self.progress('orders: %d/%d' % (chunk.stop, self.orders))
@@ -1,19 +1,46 @@
 from rest_framework import serializers
-from .models import Product, Category, ProductImage
 
+from ecofinds.metrics import TimedSerializerMixin
+from .images import RENDITIONS, needs_renditions, rendition_srcset, rendition_url
+from .inventory import update_stock
+from .models import Product, Category, ProductImage, primary_image_prefetch
+from .sparse import SparseFieldsSerializerMixin
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = "__all__"
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'is_primary']
+        fields = ['id', 'image', 'alt_text', 'is_primary', 'renditions', 'srcset']
+
+    def get_renditions(self, obj):
+        if needs_renditions(obj):
+            # Still being built (or stale after the upload was replaced)
+            return {}
+        request = self.context.get('request')
+        return {
+            name: {
+                'width': obj.renditions[name]['width'],
+                'height': obj.renditions[name]['height'],
+                'webp': rendition_url(obj, name, 'webp', request),
+                'jpeg': rendition_url(obj, name, 'jpeg', request),
+            }
+            for name, _ in RENDITIONS
+            if name in obj.renditions
+        }
 
-class ProductSerializer(serializers.ModelSerializer):
+    def get_srcset(self, obj):
+        return rendition_srcset(obj, request=self.context.get('request'))
+
+class ProductSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     seller_name = serializers.CharField(source='seller.username', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -48,20 +75,99 @@ class ProductSerializer(serializers.ModelSerializer):
         
         return product
 
-class ProductListSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        # Stock columns are never saved from the loaded row; see products.inventory.
+        stock = {field: validated_data.pop(field) for field in ('quantity', 'is_available') if field in validated_data}
+        if stock:
+            update_stock(instance, **stock)
+        return super().update(instance, validated_data)
+
+class ProductImportSerializer(ProductSerializer):
+    """
+    ProductSerializer's field rules for one row of a bulk import.
+
+    The category is given by name and resolved from the in-memory map in
+    `context['categories']`; `images` lists file names under the import's
+    image directory.
+    """
+    category = serializers.CharField()
+    images = serializers.ListField(child=serializers.CharField(), required=False)
+
+    class Meta(ProductSerializer.Meta):
+        fields = [
+            'title', 'description', 'price', 'quantity', 'category', 'condition',
+            'brand', 'model', 'year_of_manufacture', 'material', 'color',
+            'length', 'width', 'height', 'weight', 'original_packaging', 'manual_included',
+            'working_condition_description', 'is_available', 'images'
+        ]
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value.strip().lower())
+        if category is None:
+            raise serializers.ValidationError(f'Unknown category "{value}".')
+        return category
+
+class ProductBatchUpdateSerializer(ProductSerializer):
+    """
+    Partial update of one listing inside a batch request. The category is
+    checked against the in-memory `context['categories']` map instead of a
+    query per row.
+    """
+    category = serializers.IntegerField()
+
+    class Meta(ProductSerializer.Meta):
+        fields = [
+            'title', 'description', 'price', 'quantity', 'category', 'condition',
+            'brand', 'model', 'year_of_manufacture', 'material', 'color',
+            'length', 'width', 'height', 'weight', 'original_packaging', 'manual_included',
+            'working_condition_description', 'is_available'
+        ]
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return category
+
+class ProductListSerializer(TimedSerializerMixin, SparseFieldsSerializerMixin, serializers.ModelSerializer):
     seller_name = serializers.CharField(source='seller.username', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     primary_image = serializers.SerializerMethodField()
+    primary_image_srcset = serializers.SerializerMethodField()
+
+    # What the method fields read, for ?fields= query narrowing
+    sparse_prefetch = {
+        'primary_image': primary_image_prefetch,
+        'primary_image_srcset': primary_image_prefetch,
+    }
 
     class Meta:
         model = Product
         fields = [
             'id', 'title', 'price', 'category_name', 'condition',
-            'seller_name', 'is_available', 'primary_image', 'created_at'
+            'seller_name', 'is_available', 'primary_image', 'primary_image_srcset', 'created_at'
         ]
 
-    def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+    def _primary_image(self, obj):
+        # Views prefetch the primary image via Product.objects.for_listing();
+        # fall back to a query for instances loaded some other way.
+        if hasattr(obj, 'primary_images'):
+            primary_image = obj.primary_images[0] if obj.primary_images else None
+        else:
+            primary_image = obj.images.filter(is_primary=True).first()
         if primary_image and primary_image.image:
-            return self.context['request'].build_absolute_uri(primary_image.image.url)
+            return primary_image
+        return None
+
+    def get_primary_image(self, obj):
+        primary_image = self._primary_image(obj)
+        if primary_image:
+            # Feed tiles get the card-sized JPEG, not the full-resolution upload
+            return rendition_url(primary_image, 'card', 'jpeg', self.context['request'])
+        return None
+
+    def get_primary_image_srcset(self, obj):
+        primary_image = self._primary_image(obj)
+        if primary_image:
+            return rendition_srcset(primary_image, request=self.context['request'])
         return None
\ No newline at end of file
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_versions
+from .counters import CounterDeltas
+from .images import needs_renditions, schedule_renditions
+from .listings import rename_category, rename_seller, sync_listings
+from .models import Category, Product, ProductImage, ProductListing
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    key = 'product:%s' % instance.pk
+    transaction.on_commit(lambda: bump_versions('products', key))
+
+
+def _listing_state(product):
+    # Read from __dict__ so deferred fields are not loaded just for this.
+    state = product.__dict__
+    if 'is_available' not in state or 'category_id' not in state:
+        return None
+    return state['is_available'], state['category_id']
+
+
+@receiver(post_init, sender=Product)
+def remember_listing_state(sender, instance, **kwargs):
+    instance._listing_state = _listing_state(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=Product)
+def load_listing_state(sender, instance, **kwargs):
+    if instance._listing_state is None and not instance._state.adding:
+        # Loaded with the fields deferred; diff against the stored row.
+        instance._listing_state = (
+            Product.objects.filter(pk=instance.pk).values_list('is_available', 'category_id').first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def count_saved_listing(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'is_available', 'category'} & set(update_fields):
+        return
+    before = None if created else instance._listing_state
+    after = _listing_state(instance)
+    deltas = CounterDeltas()
+    if before and before[0]:
+        deltas.delisted(before[1], instance.seller_id)
+    if after and after[0]:
+        deltas.listed(after[1], instance.seller_id)
+    deltas.apply()
+    instance._listing_state = after
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_listing(sender, instance, **kwargs):
+    state = instance._listing_state
+    if state and state[0]:
+        deltas = CounterDeltas()
+        deltas.delisted(state[1], instance.seller_id)
+        deltas.apply()
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_product_image(sender, instance, **kwargs):
+    key = 'product:%s' % instance.product_id
+    transaction.on_commit(lambda: bump_versions('products', key))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_versions('categories'))
+
+
+@receiver(post_save, sender=ProductImage)
+def build_product_image_renditions(sender, instance, **kwargs):
+    if needs_renditions(instance):
+        schedule_renditions(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def sync_product_listing(sender, instance, **kwargs):
+    sync_listings([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def delete_product_listing(sender, instance, **kwargs):
+    ProductListing.objects.filter(pk=instance.pk).delete()
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def sync_product_image_listing(sender, instance, **kwargs):
+    sync_listings([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+def sync_category_listings(sender, instance, created, **kwargs):
+    if not created:
+        rename_category(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_seller_listings(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or 'username' in update_fields):
+        rename_seller(instance)
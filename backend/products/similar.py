@@ -0,0 +1,400 @@
+"""
+"Similar products": nearest neighbours over hashed TF-IDF vectors.
+
+Every available product becomes a SIMILAR_PRODUCTS_DIMENSIONS-wide
+float32 vector: the tokens of its title, brand, material, the start of its
+description and its category are feature-hashed (crc32, signed) with
+per-field weights, scaled by inverse document frequency and L2-normalized.
+The similarity of two products is the cosine of their vectors minus
+PRICE_WEIGHT times the distance of their log prices. Candidates are the
+products of the same category.
+
+`build_index()` (`manage.py rebuild_similar_index`, run periodically)
+writes the vectors sorted by category, with their ids, log prices and the
+IDF weights, as .npy files under SIMILAR_PRODUCTS_INDEX_DIR. Categories
+larger than SIMILAR_PRODUCTS_PARTITION_SIZE are split by k-means into
+partitions of about that size, stored contiguously with their centroids. Each process
+memory-maps the latest build, so workers share one copy through the page
+cache, and every SIMILAR_PRODUCTS_REFRESH_SECONDS folds the products
+updated since into a small in-memory delta that overrides their rows in
+the build. A lookup is a matrix product over the SIMILAR_PRODUCTS_PROBES
+partitions of the category nearest the product (all of it, for small
+categories) plus the category's part of the delta, and an argpartition
+for the top k; no query touches the database unless the product is not
+indexed yet.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# (column, weight) of the text that describes a product
+FIELD_WEIGHTS = (('title', 3.0), ('brand', 2.0), ('material', 1.5), ('description', 0.5))
+CATEGORY_WEIGHT = 2.0
+DESCRIPTION_TOKENS = 100
+# Score lost per unit of |log(1 + price) difference|
+PRICE_WEIGHT = 0.1
+
+# Each refresh re-reads changes this far before the newest one it has seen,
+# for transactions that committed after a later one was read.
+REFRESH_OVERLAP = timedelta(minutes=2)
+
+COLUMNS = ('id', 'category_id', 'price', 'is_available', 'updated_at') + tuple(field for field, _ in FIELD_WEIGHTS)
+ARRAYS = ('vectors', 'ids', 'categories', 'prices', 'idf', 'partitions', 'centroids')
+KMEANS_ITERATIONS = 5
+# Rows sampled per partition to fit the centroids
+KMEANS_SAMPLE = 64
+ASSIGN_CHUNK = 1 << 16
+CURRENT_FILE = 'CURRENT'
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(token, dimensions):
+    h = zlib.crc32(token.encode())
+    return h % dimensions, (1.0 if h & 0x80000000 else -1.0)
+
+
+def _add_features(row, dimensions, out):
+    """Add the weighted, signed token counts of a COLUMNS row to `out`."""
+    for offset, (_, weight) in enumerate(FIELD_WEIGHTS, start=5):
+        tokens = TOKEN_RE.findall(row[offset].lower())
+        for token in tokens[:DESCRIPTION_TOKENS]:
+            bucket, sign = _bucket(token, dimensions)
+            out[bucket] += sign * weight
+    bucket, sign = _bucket('category:%s' % row[1], dimensions)
+    out[bucket] += sign * CATEGORY_WEIGHT
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+    return vectors
+
+
+def _log_price(price):
+    return np.log1p(float(price))
+
+
+def _partition(vectors, categories, size):
+    """
+    Split each category's rows (`categories` is sorted) into spherical
+    k-means clusters of about `size` rows. Returns the row order that
+    stores each cluster contiguously, the (category, start, end) of each
+    cluster in that order, and the clusters' centroids.
+    """
+    rng = np.random.default_rng(0)
+    order, partitions, centroids = [], [], []
+    values, starts, counts = np.unique(categories, return_index=True, return_counts=True)
+    for category, start, count in zip(values.tolist(), starts.tolist(), counts.tolist()):
+        block = vectors[start:start + count]
+        clusters = -(-count // size)
+        if clusters == 1:
+            centers = _normalize(block.sum(axis=0, keepdims=True))
+            labels = np.zeros(count, dtype=np.int64)
+        else:
+            sample = block[rng.choice(count, min(count, clusters * KMEANS_SAMPLE), replace=False)]
+            centers = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                assigned = np.argmax(sample @ centers.T, axis=1)
+                for cluster in range(clusters):
+                    members = sample[assigned == cluster]
+                    if len(members):
+                        centers[cluster] = members.sum(axis=0)
+                _normalize(centers)
+            labels = np.concatenate([
+                np.argmax(block[i:i + ASSIGN_CHUNK] @ centers.T, axis=1)
+                for i in range(0, count, ASSIGN_CHUNK)
+            ])
+        order.append(start + np.argsort(labels, kind='stable'))
+        offset = start
+        for cluster, members in enumerate(np.bincount(labels, minlength=clusters).tolist()):
+            if members:
+                partitions.append((category, offset, offset + members))
+                centroids.append(centers[cluster])
+                offset += members
+    dimensions = vectors.shape[1]
+    return (
+        np.concatenate(order) if order else np.empty(0, dtype=np.int64),
+        np.array(partitions, dtype=np.int64).reshape(-1, 3),
+        np.array(centroids, dtype=np.float32).reshape(-1, dimensions),
+    )
+
+
+def build_index(directory=None, batch_size=5000, progress=None):
+    """
+    Vectorize every available product into a new build under `directory`
+    (default SIMILAR_PRODUCTS_INDEX_DIR), make it current and drop all but
+    the previous build. Returns the number of products indexed.
+    """
+    directory = directory or settings.SIMILAR_PRODUCTS_INDEX_DIR
+    dimensions = settings.SIMILAR_PRODUCTS_DIMENSIONS
+    # Taken before reading, so changes made during the build are picked up
+    # by the first refresh.
+    watermark = timezone.now()
+    queryset = Product.objects.filter(is_available=True).order_by('category_id', 'id')
+    total = queryset.count()
+
+    vectors = np.zeros((total, dimensions), dtype=np.float32)
+    ids = np.empty(total, dtype=np.int64)
+    categories = np.empty(total, dtype=np.int64)
+    prices = np.empty(total, dtype=np.float32)
+    count = 0
+    for row in queryset.values_list(*COLUMNS).iterator(chunk_size=batch_size):
+        if count == total:
+            # Listed after the count; the first refresh adds them.
+            break
+        ids[count], categories[count], prices[count] = row[0], row[1], _log_price(row[2])
+        _add_features(row, dimensions, vectors[count])
+        count += 1
+        if progress and count % batch_size == 0:
+            progress(count)
+    vectors, ids, categories, prices = vectors[:count], ids[:count], categories[:count], prices[:count]
+
+    document_frequency = np.count_nonzero(vectors, axis=0)
+    idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+    vectors *= idf
+    _normalize(vectors)
+    order, partitions, centroids = _partition(vectors, categories, settings.SIMILAR_PRODUCTS_PARTITION_SIZE)
+    vectors, ids, prices = vectors[order], ids[order], prices[order]
+
+    os.makedirs(directory, exist_ok=True)
+    name = 'build-%s' % watermark.strftime('%Y%m%d%H%M%S%f')
+    path = os.path.join(directory, name)
+    os.makedirs(path)
+    for array_name, array in zip(ARRAYS, (vectors, ids, categories, prices, idf, partitions, centroids)):
+        np.save(os.path.join(path, array_name + '.npy'), array)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'watermark': watermark.isoformat(), 'dimensions': dimensions, 'count': count}, f)
+
+    previous = current_build(directory)
+    pointer = os.path.join(directory, CURRENT_FILE)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(name)
+    os.replace(pointer + '.tmp', pointer)
+    # Processes still mapping an older build keep their open files.
+    keep = {name, os.path.basename(previous) if previous else None}
+    for entry in os.listdir(directory):
+        if entry.startswith('build-') and entry not in keep:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return count
+
+
+def current_build(directory=None):
+    """Path of the current build, or None if there is none."""
+    directory = directory or settings.SIMILAR_PRODUCTS_INDEX_DIR
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+class SimilarIndex:
+    """A build plus the delta of products changed since it was written."""
+
+    def __init__(self, vectors, ids, categories, prices, idf, partitions, centroids, watermark, path=None):
+        self.path = path
+        self.vectors = vectors
+        self.ids = ids
+        self.prices = prices
+        self.idf = idf
+        self.dimensions = vectors.shape[1]
+        self.by_id = np.argsort(ids, kind='stable')
+        self.sorted_ids = ids[self.by_id]
+        # Rows are sorted by category: one contiguous slice each.
+        values, starts, counts = np.unique(categories, return_index=True, return_counts=True)
+        self.slices = {int(c): (int(s), int(s + n)) for c, s, n in zip(values, starts, counts)}
+        self.categories = categories
+        # (category, start, end) rows and centroids, grouped by category
+        self.partitions = partitions
+        self.centroids = centroids
+        values, starts, counts = np.unique(partitions[:, 0], return_index=True, return_counts=True)
+        self.partition_ranges = {int(c): (int(s), int(s + n)) for c, s, n in zip(values, starts, counts)}
+        # Build rows overridden by the delta
+        self.stale = np.zeros(len(ids), dtype=bool)
+        # id -> (category, log price, vector) of products changed since the build
+        self.delta = {}
+        self.delta_by_category = {}
+        self.since = watermark
+        self.checked_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if name == 'vectors' else None)
+            for name in ARRAYS
+        }
+        return cls(watermark=parse_datetime(meta['watermark']), path=path, **arrays)
+
+    def _row(self, pk):
+        i = int(np.searchsorted(self.sorted_ids, pk))
+        if i < len(self.sorted_ids) and self.sorted_ids[i] == pk:
+            return int(self.by_id[i])
+        return None
+
+    def vectorize(self, rows):
+        vectors = np.zeros((len(rows), self.dimensions), dtype=np.float32)
+        for row, vector in zip(rows, vectors):
+            _add_features(row, self.dimensions, vector)
+        vectors *= self.idf
+        return _normalize(vectors)
+
+    def refresh(self, product_ids=None):
+        """Fold the products changed since the last refresh (or just `product_ids`) into the delta."""
+        queryset = Product.objects.all()
+        if product_ids is None:
+            queryset = queryset.filter(updated_at__gte=self.since - REFRESH_OVERLAP)
+        else:
+            queryset = queryset.filter(pk__in=product_ids)
+        rows = list(queryset.values_list(*COLUMNS))
+        if not rows:
+            return
+        vectors = self.vectorize(rows)
+        with self.lock:
+            delta = dict(self.delta)
+            for row, vector in zip(rows, vectors):
+                pk = row[0]
+                build_row = self._row(pk)
+                if build_row is not None:
+                    self.stale[build_row] = True
+                if row[3]:
+                    delta[pk] = (row[1], _log_price(row[2]), vector)
+                else:
+                    delta.pop(pk, None)
+            grouped = defaultdict(list)
+            for pk, (category, price, vector) in delta.items():
+                grouped[category].append((pk, price, vector))
+            self.delta_by_category = {
+                category: (
+                    np.array([pk for pk, _, _ in entries], dtype=np.int64),
+                    np.array([price for _, price, _ in entries], dtype=np.float32),
+                    np.stack([vector for _, _, vector in entries]),
+                )
+                for category, entries in grouped.items()
+            }
+            self.delta = delta
+            if product_ids is None:
+                self.since = max(self.since, max(row[4] for row in rows))
+        if product_ids is None and len(delta) > settings.SIMILAR_PRODUCTS_DELTA_WARNING:
+            logger.warning('Similar products delta holds %d products; rebuild the index.', len(delta))
+
+    def _entry(self, pk):
+        """(category, log price, vector) of an indexed product, or None."""
+        if pk in self.delta:
+            return self.delta[pk]
+        row = self._row(pk)
+        if row is None or self.stale[row]:
+            return None
+        return int(self.categories[row]), float(self.prices[row]), np.asarray(self.vectors[row])
+
+    def similar(self, product_ids, k):
+        """
+        `{pk: [(id, score), ...]}` with the top `k` neighbours of each
+        product, best first, computed per category in one matrix product.
+        Products that are not (or no longer) available map to None.
+        """
+        entries = {pk: self._entry(pk) for pk in product_ids}
+        missing = [pk for pk, entry in entries.items() if entry is None]
+        if missing:
+            # Listed since the last refresh, or never indexed.
+            self.refresh(missing)
+            entries.update({pk: self._entry(pk) for pk in missing})
+
+        groups = defaultdict(list)
+        for pk, entry in entries.items():
+            if entry is not None:
+                groups[entry[0]].append(pk)
+        results = {pk: None for pk in product_ids}
+        for category, pks in groups.items():
+            queries = np.stack([entries[pk][2] for pk in pks])
+            query_prices = np.array([entries[pk][1] for pk in pks], dtype=np.float32)
+            segments = [
+                (self.ids[start:end], self.prices[start:end], self.vectors[start:end], self.stale[start:end])
+                for start, end in self._probe(category, queries)
+            ]
+            if category in self.delta_by_category:
+                segments.append(self.delta_by_category[category] + (None,))
+            # k + 1 per segment: the product itself is among its candidates.
+            candidates = [self._top(queries, query_prices, k + 1, *segment) for segment in segments]
+            for i, pk in enumerate(pks):
+                merged = sorted(
+                    (pair for segment in candidates for pair in segment[i] if pair[0] != pk),
+                    key=lambda pair: pair[1], reverse=True,
+                )
+                results[pk] = merged[:k]
+        return results
+
+    def _probe(self, category, queries):
+        """(start, end) of the build rows to scan for `queries` in `category`."""
+        first, last = self.partition_ranges.get(category, (0, 0))
+        probes = settings.SIMILAR_PRODUCTS_PROBES
+        if last - first <= probes:
+            return [self.slices[category]] if category in self.slices else []
+        scores = queries @ self.centroids[first:last].T
+        nearest = np.unique(np.argpartition(-scores, probes - 1, axis=1)[:, :probes])
+        return [(int(self.partitions[first + i, 1]), int(self.partitions[first + i, 2])) for i in nearest]
+
+    @staticmethod
+    def _top(queries, query_prices, k, ids, prices, vectors, stale):
+        scores = queries @ np.asarray(vectors).T
+        scores -= PRICE_WEIGHT * np.abs(query_prices[:, None] - prices[None, :])
+        if stale is not None and stale.any():
+            scores[:, stale] = -np.inf
+        if scores.shape[1] > k:
+            top = np.argpartition(-scores, k, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), (len(scores), scores.shape[1]))
+        return [
+            [(int(ids[j]), float(row[j])) for j in columns if row[j] > -np.inf]
+            for row, columns in zip(scores, top)
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    This process's index: the current build, reloaded when a newer one is
+    made current and refreshed every SIMILAR_PRODUCTS_REFRESH_SECONDS.
+    None until a build exists.
+    """
+    global _index
+    refresh = False
+    with _index_lock:
+        index = _index
+        now = time.monotonic()
+        if index is None or now - index.checked_at >= settings.SIMILAR_PRODUCTS_REFRESH_SECONDS:
+            path = current_build()
+            if path is None:
+                return None
+            if index is None or index.path != path:
+                index = _index = SimilarIndex.load(path)
+            index.checked_at = now
+            refresh = True
+    if refresh:
+        index.refresh()
+    return index
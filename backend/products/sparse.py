@@ -0,0 +1,130 @@
+"""
+Sparse fieldsets for product endpoints.
+
+`?fields=title,price` returns only the named fields and `?omit=description`
+returns all but the named ones; both take comma-separated names and can be
+combined. Views using `SparseFieldsMixin` hand the selection to their
+serializer through the context and narrow their query to what the kept
+fields read: `only()` the needed columns, and only the joins and prefetches
+those fields use, so large TextFields are not read unless asked for.
+"""
+
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(request, param):
+    names = []
+    for value in request.query_params.getlist(param):
+        names.extend(name.strip() for name in value.split(',') if name.strip())
+    return names
+
+
+def select_fields(request, available):
+    """
+    The names in `available` kept by the request's `?fields=` and `?omit=`,
+    in `available` order, or None if the request asks for every field.
+    """
+    fields, omit = _names(request, FIELDS_PARAM), _names(request, OMIT_PARAM)
+    if not fields and not omit:
+        return None
+    unknown = [name for name in fields + omit if name not in available]
+    if unknown:
+        raise ValidationError({
+            FIELDS_PARAM: 'Unknown field(s): %s. Available: %s.' % (', '.join(unknown), ', '.join(available)),
+        })
+    kept = set(fields or available) - set(omit)
+    return [name for name in available if name in kept]
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    """Names of the fields `serializer_class` outputs, in order."""
+    if hasattr(serializer_class, 'field_names'):
+        # Row serializers (products.rows) list theirs up front.
+        return tuple(serializer_class.field_names)
+    return tuple(name for name, field in serializer_class().fields.items() if not field.write_only)
+
+
+def narrow_queryset(queryset, serializer_class, fields, keep=()):
+    """
+    Load only what `fields` of `serializer_class` read, plus the `keep`
+    columns (e.g. sort keys). Sources are followed through the model's
+    fields; a serializer declares the rest in `sparse_prefetch`, a map of
+    field name to a function returning the Prefetch the field reads. If any
+    field reads something else (a property, a whole object), the queryset
+    is returned unchanged.
+    """
+    if fields is None:
+        return queryset
+    opts = queryset.model._meta
+    serializer_fields = serializer_class().fields
+    extra = getattr(serializer_class, 'sparse_prefetch', {})
+    columns, relations, prefetches = {opts.pk.name, *keep}, [], {}
+    for name in fields:
+        if name in extra:
+            prefetch = extra[name]()
+            prefetches[prefetch.prefetch_to] = prefetch
+            continue
+        path = serializer_fields[name].source_attrs
+        try:
+            model_field = opts.get_field(path[0]) if path else None
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is None or len(path) > 2:
+            return queryset
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetches[path[0]] = path[0]
+        elif len(path) == 2:
+            if not model_field.is_relation:
+                return queryset
+            relations.append(path[0])
+            columns.add('%s__%s' % tuple(path))
+        else:
+            columns.add(path[0])
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.prefetch_related(*prefetches.values()).only(*columns)
+
+
+class SparseFieldsSerializerMixin:
+    """Drops the fields not in `context['fields']` (when that is set)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin:
+    """
+    View support for `?fields=` / `?omit=`. Querysets are narrowed by
+    calling `sparse_queryset()`; the paginator's sort keys and the view's
+    `ordering_fields` are always loaded.
+    """
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = select_fields(self.request, readable_fields(self.get_serializer_class()))
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_sparse_fields()
+        return context
+
+    def sparse_keys(self):
+        ordering = getattr(self.pagination_class, 'ordering', None) or ()
+        return {field.lstrip('-') for field in ordering} | set(getattr(self, 'ordering_fields', None) or ())
+
+    def sparse_queryset(self, queryset):
+        return narrow_queryset(queryset, self.get_serializer_class(), self.get_sparse_fields(), self.sparse_keys())
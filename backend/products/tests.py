@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .models import Category, Product, ProductImage
+
+
+class ProductQueryCountTests(TestCase):
+    """
+    The product endpoints read a page in a fixed number of queries; a
+    per-row query coming back shows up as a count that grows with the rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user(email='seller@example.com', username='seller', password='pw123456')
+        cls.categories = [Category.objects.create(name=name) for name in ('Furniture', 'Books', 'Clothing')]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def add_products(self, count):
+        products = []
+        for i in range(count):
+            product = Product.objects.create(
+                title='Product %d' % i, description='Description', price=10 + i, quantity=2,
+                category=self.categories[i % len(self.categories)], seller=self.seller,
+            )
+            ProductImage.objects.create(product=product, image='products/%d.jpg' % i, is_primary=True)
+            ProductImage.objects.create(product=product, image='products/%d-back.jpg' % i)
+            products.append(product)
+        return products
+
+    def get(self, url, rows, queries):
+        for count in (rows, rows * 3):
+            self.add_products(count - Product.objects.count())
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_product_list(self):
+        response = self.get('/api/products/', 4, 2)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_product_list_search_and_filters(self):
+        response = self.get('/api/products/?search=Product&price_min=11&price_max=19&ordering=price', 4, 2)
+        expected = Product.objects.filter(price__range=(11, 19)).order_by('price', 'pk').values_list('pk', flat=True)
+        self.assertEqual([product['id'] for product in response.data['results']], list(expected))
+        self.assertLess(len(expected), Product.objects.count())
+
+    def test_product_detail(self):
+        product = self.add_products(1)[0]
+        for _ in range(2):
+            cache.clear()
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/products/%d/' % product.pk)
+            self.assertEqual(len(response.data['images']), 2)
+            # Other listings must not change the count.
+            self.add_products(5)
+
+    def test_my_products(self):
+        response = self.get('/api/products/my-products/', 4, 2)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_batch_lookup(self):
+        products = self.add_products(6)
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/products/batch/?ids=%s' % ','.join(str(p.pk) for p in products))
+        self.assertEqual(len(response.data['results']), 6)
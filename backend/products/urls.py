@@ -5,7 +5,13 @@ urlpatterns = [
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
     path('', views.ProductListView.as_view(), name='product-list'),
     path('create/', views.ProductCreateView.as_view(), name='product-create'),
+    path('import/', views.ProductImportView.as_view(), name='product-import'),
+    path('export/', views.ProductExportView.as_view(), name='product-export'),
     path('my-products/', views.UserProductsView.as_view(), name='user-products'),
+    path('my-products/batch/', views.UserProductsBatchView.as_view(), name='user-products-batch'),
+    path('batch/', views.ProductBatchView.as_view(), name='product-batch'),
+    path('autocomplete/', views.AutocompleteView.as_view(), name='product-autocomplete'),
     path('<int:pk>/', views.ProductDetailView.as_view(), name='product-detail'),
+    path('<int:pk>/similar/', views.SimilarProductsView.as_view(), name='product-similar'),
     path('<int:pk>/edit/', views.ProductUpdateView.as_view(), name='product-update'),
 ]
\ No newline at end of file
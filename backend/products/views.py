@@ -1,34 +1,62 @@
-from rest_framework import generics, filters, status
+from collections import defaultdict
+
+from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q
-from .models import Product, Category
-from .serializers import ProductSerializer, ProductListSerializer, CategorySerializer
+from django.urls import reverse
+from django.utils import timezone
+from ecofinds.db_router import ReplicaReadMixin
+from ecofinds.renderers import FastJSONRenderer
+from .autocomplete import MAX_SUGGESTIONS, get_index as get_autocomplete_index
+from .cache import CachedResponseMixin, bump_versions, get_versions, may_be_stale, response_cache_key
+from .counters import CounterDeltas
+from .listings import sync_listings
+from .export import ProductExporter
+from .facets import compute_facets
+from .filters import FullTextSearchFilter, ProductFilter, ProductListingFilter, RelevanceOrderingFilter
+from .inventory import listing_flags
+from .importer import FORMATS as IMPORT_FORMATS, ProductImporter, detect_format
+from .models import Product, Category, ProductListing
+from .pagination import ProductPagination
+from .rows import ProductListRows, ProductListingRows
+from .serializers import ProductSerializer, ProductListSerializer, ProductBatchUpdateSerializer, CategorySerializer
+from .similar import get_index
+from .sparse import SparseFieldsMixin
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(ReplicaReadMixin, CachedResponseMixin, generics.ListAPIView):
+    cache_namespaces = ('categories',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
-class ProductListView(generics.ListAPIView):
-    queryset = Product.objects.filter(is_available=True)
-    serializer_class = ProductListSerializer
+class ProductListView(SparseFieldsMixin, ReplicaReadMixin, CachedResponseMixin, generics.ListAPIView):
+    cache_namespaces = ('products', 'categories')
+    queryset = Product.objects.filter(is_available=True).for_listing()
     permission_classes = [AllowAny]
+    pagination_class = ProductPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
     # --- MODIFICATIONS START ---
     filter_backends = [
         DjangoFilterBackend, 
-        filters.SearchFilter, 
-        filters.OrderingFilter  # Add OrderingFilter
+        FullTextSearchFilter,  # MySQL FULLTEXT, ranked by relevance
+        RelevanceOrderingFilter  # best match first when searching
     ]
     
-    # Fields for filtering (e.g., ?category=1)
-    filterset_fields = ['category', 'condition']
+    # Fields for filtering (e.g., ?category=1 or ?price_min=10&price_max=50)
+    # come from ProductFilter, or ProductListingFilter on the read table.
     
-    # Fields for searching (e.g., ?search=bottle)
-    search_fields = ['title', 'description', 'seller__username']
+    # Fields for searching (e.g., ?search=bottle). On MySQL the FULLTEXT index
+    # over FullTextSearchFilter.fulltext_fields is used instead of these.
+    search_fields = ['title', 'description']
 
     # Fields for sorting (e.g., ?ordering=price or ?ordering=-created_at)
     ordering_fields = ['price', 'created_at']
@@ -36,11 +64,163 @@ class ProductListView(generics.ListAPIView):
     # Default sorting order if none is specified
     ordering = ['-created_at'] 
 
-class ProductDetailView(generics.RetrieveAPIView):
-    queryset = Product.objects.filter(is_available=True)
+    def from_listings(self):
+        # The read table has no description to search, so searches keep
+        # using the product table.
+        return settings.PRODUCT_FEED_FROM_LISTINGS and not self.request.query_params.get('search')
+
+    @property
+    def filterset_class(self):
+        return ProductListingFilter if self.from_listings() else ProductFilter
+
+    def get_queryset(self):
+        if self.from_listings():
+            return ProductListing.objects.filter(is_available=True)
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        # Same output as ProductListSerializer, built from .values() rows
+        return ProductListingRows if self.from_listings() else ProductListRows
+
+    def paginate_queryset(self, queryset):
+        # Only the columns of the ?fields= selection are read
+        return super().paginate_queryset(self.get_serializer_class().rows(queryset, self.get_sparse_fields()))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Optional facet counts (e.g., ?facets=1) for the current search and filters
+        if request.query_params.get('facets') in ('1', 'true'):
+            response.data['facets'] = compute_facets(
+                self.filter_queryset(self.get_queryset()),
+                category_name='category_name' if self.from_listings() else 'category__name',
+            )
+        return response
+
+class ProductDetailView(SparseFieldsMixin, ReplicaReadMixin, CachedResponseMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.filter(is_available=True).for_detail()
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces_for(self.kwargs['pk'])
+
+    @staticmethod
+    def cache_namespaces_for(pk):
+        return ('product:%s' % pk, 'categories')
+
+    @classmethod
+    def cache_key_for(cls, request, pk, versions):
+        """Key of the cached `GET <pk>/` response (no query parameters) under `versions`."""
+        path = reverse('product-detail', kwargs={'pk': pk})
+        return response_cache_key(cls.__name__, request, path, [], cls.cache_namespaces_for(pk), versions)
+
+class ProductBatchView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    Several products by id (`?ids=3,1,2`), in request order, with
+    `{"id": 2, "status": "not_found"}` for ids that do not exist or are not
+    available. Each product is ProductDetailView's representation, read from
+    and written to that view's response cache; misses are loaded in one
+    query plus the image prefetch.
+    """
+    queryset = Product.objects.filter(is_available=True).for_detail()
+    serializer_class = ProductSerializer
+    permission_classes = [AllowAny]
+    max_ids = 300
+
+    def get(self, request, *args, **kwargs):
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({'error': 'ids must be comma-separated integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'error': 'Pass the product ids as ?ids=1,2,3.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids:
+            return Response({'error': f'At most {self.max_ids} ids per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        unique = list(dict.fromkeys(ids))
+        names = {pk: ProductDetailView.cache_namespaces_for(pk) for pk in unique}
+        all_names = list(dict.fromkeys(name for pk_names in names.values() for name in pk_names))
+        current = dict(zip(all_names, get_versions(*all_names)))
+        versions = {pk: [current[name] for name in pk_names] for pk, pk_names in names.items()}
+        keys = {pk: ProductDetailView.cache_key_for(request, pk, versions[pk]) for pk in unique}
+
+        cached = cache.get_many(keys.values())
+        found = {pk: cached[key] for pk, key in keys.items() if key in cached}
+        missing = [pk for pk in unique if pk not in found]
+        if missing:
+            fresh = {}
+            for product in self.get_queryset().filter(pk__in=missing):
+                found[product.pk] = self.get_serializer(product).data
+                if not may_be_stale(self.read_from_replica, versions[product.pk]):
+                    fresh[keys[product.pk]] = found[product.pk]
+            cache.set_many(fresh, settings.PRODUCT_CACHE_TIMEOUT)
+
+        results = [found.get(pk) or {'id': pk, 'status': 'not_found'} for pk in ids]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+class SimilarProductsView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    The available products most similar to product `pk`, best first, from
+    the in-memory products.similar index (`?limit=`, default 12).
+    """
+    serializer_class = ProductListRows
+    permission_classes = [AllowAny]
+    default_limit = 12
+    max_limit = 50
+
+    def get(self, request, pk, *args, **kwargs):
+        index = get_index()
+        if index is None:
+            return Response(
+                {'error': 'The similar products index has not been built yet.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # A few spare neighbours for ones sold out since the last refresh
+        neighbours = index.similar([pk], limit + 5)[pk]
+        if neighbours is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        ids = [product_id for product_id, _ in neighbours]
+        rows = {
+            row['id']: row
+            for row in ProductListRows.rows(Product.objects.filter(pk__in=ids, is_available=True))
+        }
+        page = [rows[product_id] for product_id in ids if product_id in rows][:limit]
+        return Response({'results': self.get_serializer(page, many=True).data}, status=status.HTTP_200_OK)
+
+class AutocompleteView(generics.GenericAPIView):
+    """
+    Search box suggestions for `?q=` from titles, brands and category names,
+    most popular first, from the in-memory products.autocomplete index
+    (`?limit=`, default 8). No database access per request.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    default_limit = 8
+    max_limit = MAX_SUGGESTIONS
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        index = get_autocomplete_index()
+        if index is None:
+            return Response(
+                {'error': 'Suggestions are not available yet.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        results = index.suggest(query, limit)
+        return Response({'query': query, 'results': results}, status=status.HTTP_200_OK)
+
 class ProductCreateView(generics.CreateAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
@@ -63,16 +243,140 @@ class ProductCreateView(generics.CreateAPIView):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-class UserProductsView(generics.ListAPIView):
+class ProductImportView(generics.GenericAPIView):
+    """
+    Bulk-create listings for the current user from an uploaded CSV or JSONL
+    file (`file`, optional `format`). Rows are streamed and validated one by
+    one; the response reports how many were created and why others failed.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload a CSV or JSONL file as "file".'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('format') or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response({'error': 'Format must be one of: csv, jsonl.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = ProductImporter(
+            request.user,
+            chunk_size=settings.PRODUCT_IMPORT_CHUNK_SIZE,
+            image_dir=settings.PRODUCT_IMPORT_IMAGE_DIR,
+        )
+        report = importer.run(upload.file, fmt)
+        response_status = status.HTTP_201_CREATED if report.created else status.HTTP_400_BAD_REQUEST
+        return Response(report.as_dict(), status=response_status)
+
+class ProductExportView(generics.GenericAPIView):
+    """Stream every product matching the filters as CSV or JSONL (`?output=`)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return ProductExporter().response(request)
+
+class UserProductsView(SparseFieldsMixin, generics.ListAPIView):
     serializer_class = ProductListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ProductPagination
 
     def get_queryset(self):
-        return Product.objects.filter(seller=self.request.user)
+        return self.sparse_queryset(Product.objects.filter(seller=self.request.user).for_listing())
+
+class UserProductsBatchView(generics.GenericAPIView):
+    """
+    Apply many partial updates and deletes to the current user's listings.
+
+    The body is a list of `{"id": 1, "price": "9.99", ...}` updates and
+    `{"id": 2, "delete": true}` deletes. The listings are loaded and locked
+    with one query, updates are written with one bulk_update per set of
+    fields the items change, and the response reports the outcome of
+    every item.
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 1000
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({'error': f'At most {self.max_items} items per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if any(isinstance(item, dict) and not isinstance(item.get('delete', False), bool) for item in items):
+            return Response({'error': '"delete" must be true or false.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = [item.get('id') for item in items if isinstance(item, dict)]
+        categories = Category.objects.in_bulk()
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Locked, so stock is neither read stale nor written back stale.
+            owned = (
+                Product.objects.select_for_update().filter(seller=request.user).order_by('pk')
+                               .in_bulk([i for i in ids if isinstance(i, int)])
+            )
+            results, to_update, to_delete = [], {}, set()
+            listings = CounterDeltas()
+            for item in items:
+                product_id = item.get('id') if isinstance(item, dict) else None
+                product = owned.get(product_id) if isinstance(product_id, int) else None
+                if product is None or product_id in to_delete or product_id in to_update:
+                    outcome = 'not_found' if product is None else 'duplicate'
+                    results.append({'id': product_id, 'status': outcome})
+                    continue
+
+                if item.get('delete'):
+                    to_delete.add(product_id)
+                    results.append({'id': product_id, 'status': 'deleted'})
+                    continue
+
+                changes = {key: value for key, value in item.items() if key not in ('id', 'delete')}
+                serializer = ProductBatchUpdateSerializer(
+                    product, data=changes, partial=True, context={'request': request, 'categories': categories},
+                )
+                if not serializer.is_valid():
+                    results.append({'id': product_id, 'status': 'invalid', 'errors': serializer.errors})
+                    continue
+                data = serializer.validated_data
+                if product.is_available:
+                    listings.delisted(product.category_id, product.seller_id)
+                fields = set(data) | {'updated_at'}
+                if {'quantity', 'is_available'} & fields:
+                    listed = data.get('is_available', product.is_available or product.is_sold_out)
+                    data['is_available'], data['is_sold_out'] = listing_flags(listed, data.get('quantity', product.quantity))
+                    fields |= {'is_available', 'is_sold_out'}
+                for field, value in data.items():
+                    setattr(product, field, value)
+                if product.is_available:
+                    listings.listed(product.category_id, product.seller_id)
+                product.updated_at = now
+                to_update[product_id] = (product, frozenset(fields))
+                results.append({'id': product_id, 'status': 'updated'})
+
+            if to_update:
+                # Each product gets only its own item's fields.
+                groups = defaultdict(list)
+                for product, fields in to_update.values():
+                    groups[fields].append(product)
+                for fields, products in groups.items():
+                    Product.objects.bulk_update(products, fields=sorted(fields), batch_size=500)
+                # bulk_update skips post_save, so update counters and
+                # invalidate cached reads here.
+                listings.apply()
+                sync_listings(to_update)
+                transaction.on_commit(lambda: bump_versions(
+                    'products', *('product:%s' % product_id for product_id in to_update)
+                ))
+            if to_delete:
+                Product.objects.filter(seller=request.user, id__in=to_delete).delete()
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
 
 class ProductUpdateView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Product.objects.filter(seller=self.request.user)
\ No newline at end of file
+        return Product.objects.filter(seller=self.request.user).for_detail()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import React from 'react';
+
+/**
+ * "Load more" button for paginated lists; renders nothing on the last page.
+ * @param {object} props - The component props.
+ * @param {string|null} props.nextUrl - URL of the next page, or null.
+ * @param {boolean} props.loading - Whether the next page is being fetched.
+ * @param {Function} props.onLoadMore - Fetches the next page.
+ */
+const LoadMoreButton = ({ nextUrl, loading, onLoadMore }) => {
+  if (!nextUrl) {
+    return null;
+  }
+
+  return (
+    <div className="text-center my-10">
+      <button
+        type="button"
+        onClick={onLoadMore}
+        disabled={loading}
+        className="inline-block bg-white text-green-600 font-semibold py-2.5 px-8 rounded-lg border-2 border-green-500 shadow-sm hover:bg-green-50 transition-colors duration-300 disabled:opacity-50"
+      >
+        {loading ? 'Loading...' : 'Load more'}
+      </button>
+    </div>
+  );
+};
+
+export default LoadMoreButton;
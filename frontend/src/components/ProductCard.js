@@ -25,6 +25,8 @@ const ProductCard = ({ product, onAddToCart }) => {
             {product.primary_image ? (
               <img
                 src={product.primary_image}
+                srcSet={product.primary_image_srcset || undefined}
+                sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
                 alt={product.title}
                 className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-105"
               />
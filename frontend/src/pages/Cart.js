@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import api from '../services/api';
+import api, { fetchAllPages } from '../services/api';
 
 const Cart = () => {
   const { user } = useAuth();
@@ -17,8 +17,8 @@ const Cart = () => {
     }
     const fetchCartItems = async () => {
       try {
-        const response = await api.get('/api/cart/');
-        setCartItems(response.data.results || response.data);
+        // Every page, so the total matches what checkout charges
+        setCartItems(await fetchAllPages('/api/cart/'));
       } catch (error) {
         console.error('Error fetching cart items:', error);
       } finally {
@@ -1,13 +1,18 @@
-import React, { useState, useEffect, useMemo } from 'react'; // Import useMemo
+import React, { useState, useEffect, useMemo, useRef } from 'react'; // Import useMemo
 import ResponsiveSearchBar from '../components/SearcBar';
 import ProductCard from '../components/ProductCard';
-import api from '../services/api'; // Make sure this points to your actual API client
+import api, { fetchPage } from '../services/api'; // Make sure this points to your actual API client
+import LoadMoreButton from '../components/LoadMoreButton';
 import { useAuth } from '../contexts/AuthContext'; 
 
 const App = () => {
   const [products, setProducts] = useState([]);
   const [categories, setCategories] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Bumped on every new search, so a late "load more" page is dropped
+  const queryRef = useRef(0);
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedCategory, setSelectedCategory] = useState("");
   const [sortBy, setSortBy] = useState(""); // e.g., 'price_desc'
@@ -19,6 +24,7 @@ const App = () => {
   }, []);
 
   const fetchProducts = async (search, category, sort, group) => {
+    const query = ++queryRef.current;
     try {
       setLoading(true);
       const params = new URLSearchParams();
@@ -51,12 +57,29 @@ const App = () => {
 
       // We don't send 'group' to the backend, it will be handled on the frontend
       // The backend uses 'api' now, not 'mockApi'
-      const response = await api.get(`/api/products/?${params}`);
-      setProducts(response.data);
+      const page = await fetchPage(`/api/products/?${params}`);
+      if (query !== queryRef.current) return;
+      setProducts(page.results);
+      setNextUrl(page.next);
     } catch (error) {
       console.error("Error fetching products:", error);
     } finally {
-      setLoading(false);
+      if (query === queryRef.current) setLoading(false);
+    }
+  };
+
+  const loadMore = async () => {
+    const query = queryRef.current;
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(nextUrl);
+      if (query !== queryRef.current) return;
+      setProducts((current) => [...current, ...page.results]);
+      setNextUrl(page.next);
+    } catch (error) {
+      console.error("Error fetching products:", error);
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -217,6 +240,7 @@ const App = () => {
             )}
           </div>
         )}
+        {!loading && <LoadMoreButton nextUrl={nextUrl} loading={loadingMore} onLoadMore={loadMore} />}
       </main>
     </div>
   );
@@ -1,13 +1,16 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import api from '../services/api';
+import api, { fetchPage } from '../services/api';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const MyListings = () => {
   const { user } = useAuth();
   const navigate = useNavigate();
   const [products, setProducts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (!user) {
@@ -16,8 +19,9 @@ const MyListings = () => {
     }
     const fetchMyProducts = async () => {
       try {
-        const response = await api.get('/api/products/my-products/');
-        setProducts(response.data.results || response.data);
+        const page = await fetchPage('/api/products/my-products/');
+        setProducts(page.results);
+        setNextUrl(page.next);
       } catch (error) {
         console.error('Error fetching products:', error);
       } finally {
@@ -27,6 +31,19 @@ const MyListings = () => {
     fetchMyProducts();
   }, [user, navigate]);
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(nextUrl);
+      setProducts((current) => [...current, ...page.results]);
+      setNextUrl(page.next);
+    } catch (error) {
+      console.error('Error fetching products:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const deleteProduct = async (productId) => {
     if (window.confirm('Are you sure you want to delete this listing?')) {
       try {
@@ -114,6 +131,7 @@ const MyListings = () => {
           )}
         </div>
       )}
+      {!loading && <LoadMoreButton nextUrl={nextUrl} loading={loadingMore} onLoadMore={loadMore} />}
     </div>
   );
 };
@@ -1,13 +1,16 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import api from '../services/api';
+import { fetchPage } from '../services/api';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const OrderHistory = () => {
   const { user } = useAuth();
   const navigate = useNavigate();
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (!user) {
@@ -16,8 +19,9 @@ const OrderHistory = () => {
     }
     const fetchOrders = async () => {
       try {
-        const response = await api.get('/api/cart/orders/');
-        setOrders(response.data.results || response.data);
+        const page = await fetchPage('/api/cart/orders/');
+        setOrders(page.results);
+        setNextUrl(page.next);
       } catch (error) {
         console.error('Error fetching orders:', error);
       } finally {
@@ -27,6 +31,19 @@ const OrderHistory = () => {
     fetchOrders();
   }, [user, navigate]);
 
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(nextUrl);
+      setOrders((current) => [...current, ...page.results]);
+      setNextUrl(page.next);
+    } catch (error) {
+      console.error('Error fetching orders:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (dateString) => {
     return new Date(dateString).toLocaleDateString('en-US', {
       year: 'numeric',
@@ -96,6 +113,7 @@ const OrderHistory = () => {
                   </div>
                 </div>
               ))}
+              <LoadMoreButton nextUrl={nextUrl} loading={loadingMore} onLoadMore={loadMore} />
             </div>
           ) : (
             <div className="text-center py-20 bg-gray-50 rounded-lg">
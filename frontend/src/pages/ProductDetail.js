@@ -84,6 +84,8 @@ const ProductDetail = () => {
               {product.images && product.images.length > 0 ? (
                 <img
                   src={product.images[0].image}
+                  srcSet={product.images[0].srcset || undefined}
+                  sizes="(min-width: 768px) 50vw, 100vw"
                   alt={product.title}
                   className="w-full h-full object-cover"
                 />
@@ -64,5 +64,24 @@ api.interceptors.response.use(
   }
 );
 
+// List endpoints return one page at a time: { results, next, previous }.
+// `next` is the absolute URL of the following page, or null on the last one.
+export const fetchPage = async (url) => {
+  const response = await api.get(url);
+  return { results: response.data.results || response.data, next: response.data.next || null };
+};
+
+// Every row of a paginated endpoint, following `next` to the last page.
+export const fetchAllPages = async (url) => {
+  const rows = [];
+  let nextUrl = url;
+  while (nextUrl) {
+    const page = await fetchPage(nextUrl);
+    rows.push(...page.results);
+    nextUrl = page.next;
+  }
+  return rows;
+};
+
 export default api;
 